@@ -8,127 +8,428 @@ import lib.stddraw as stddraw  # stddraw is used as a basic graphics library
 from lib.picture import Picture  # used for displaying images
 from lib.color import Color  # used for coloring the game menu
 import os  # the os module is used for file and directory operations
-from game_grid import GameGrid # the class for modeling the game grid
-from tetromino import Tetromino # the class for modeling the tetrominoes
-import random # used for creating tetrominoes with random types/shapes
+from game_grid import GameGrid, setup_canvas # the game grid and its canvas
+from scheduler import Scheduler # used for timing the gravity and the frames
+from profiler import Profiler # used for the performance overlay
+from replay import Replay # used for recording and playing back the games
+from autoplayer import AutoPlayer # used for playing the game automatically
+import snapshot  # used for saving and loading the games
+import random  # used for the seeds of the games
+import time  # used for naming the replay files
+import argparse  # used for parsing the command line arguments
 
 # MAIN FUNCTION OF THE PROGRAM
 #-------------------------------------------------------------------------------
-# Main function where this program starts execution
-def start():
-
-   # set the dimensions of the game grid in the canvas()
-   global grid
-   # create the game grid
-   grid = GameGrid(grid_h, grid_w)
-   # create the first tetromino to enter the game grid
-   # by using the create_tetromino function defined below
-   current_tetromino = create_tetromino(grid_h, grid_w)
-   next_tetromino = create_tetromino(grid_h, grid_w)
-   grid.current_tetromino = current_tetromino
-   grid.next_tetromino = next_tetromino
-   # it's for game over menu to start menu
-   stddraw.clearKeysTyped()
-   pause = False
-
-   # main game loop (keyboard interaction for moving the tetromino)
-   while True:
+# Main function where this program starts execution, if a replay is given the
+# game recorded in it is played back (as fast as possible if turbo is True)
+# instead of the game being played by the user. The main menu is displayed
+# before the game if show_menu is True. Returns the final score of a replay.
+def start(replay=None, turbo=False, show_menu=False):
+   # the arrow keys for moving the tetromino are repeated while they are held
+   # down (after a delay of key_repeat_delay ms, every key_repeat_interval ms)
+   stddraw.setKeyRepeat(key_repeat_delay, key_repeat_interval,
+                        ["left", "right", "down"])
+   scenes = SceneManager(replay, turbo)
+   scenes.enter("menu" if show_menu else "playing")
+   return scenes.run()
+
+# Class used for storing the state of one game: the game grid, the replay it
+# is recorded to or played back from and the clocks of its game loop. Each new
+# game replaces the previous one, which is freed.
+class Game:
+   # Constructor that creates a new game, if a replay is given the game
+   # recorded in it is played back
+   def __init__(self, replay=None, turbo=False):
+      # the game grid of the current game is global
+      global grid
+      if replay is None:
+         # the seed of the random generator of the game is recorded in a
+         # replay with the keys typed by the user
+         seed = random.randrange(2 ** 32)
+         self.recording = Replay(seed, grid_h, grid_w)
+         if record_replays:
+            self.recording.record_to(get_replay_path(seed))
+      else:
+         seed = replay.seed
+         self.recording = None
+      self.replay, self.turbo = replay, turbo
+      # create the game grid (it also runs the rules of the game)
+      grid = self.grid = GameGrid(grid_h, grid_w, seed)
+      # create the first tetromino to enter the game grid (and the next one)
+      self.grid.spawn()
+      # the gravity ticks (every grid.speed ms) and the frames (at most 60 per
+      # second) are scheduled on their own clocks, a frame is rendered only
+      # when something changed
+      self.scheduler = Scheduler(self.grid.speed)
+      self.redraw = True
+      # the number of the gravity ticks so far (the keys are recorded with it)
+      self.tick = 0
+      # the tetromino whose keys were given by the auto player last
+      self.planned = None
+
+   # Method that ends the replay the game is recorded to (if any) with the
+   # given score (the score of the game grid by default)
+   def finish(self, score=None):
+      if self.recording is not None:
+         if score is None:
+            score = self.grid.score
+         self.recording.finish(self.tick, score)
+         self.recording = None
+
+# Class used for running the program as a state machine of scenes in a single
+# loop: the main menu, the game being played or paused, the how to play menu
+# shown over the game and the game over screen. Each iteration of the loop
+# runs the current scene once, the scenes change without any recursion.
+class SceneManager:
+   # Constructor that creates the scene manager, the games are played back
+   # from the given replay (if any)
+   def __init__(self, replay=None, turbo=False):
+      self.replay, self.turbo = replay, turbo
+      self.scene = None
+      # the current game (None before the first game starts)
+      self.game = None
+      # the scene the how to play menu returns to
+      self.help_return = None
+      # the start button of the menu or the game over screen as (x, y, w, h)
+      self.button = None
+      # the loop ends when result is set (the final score of a replay)
+      self.done, self.result = False, None
+
+   # Method that changes the scene to the given scene and draws it if it does
+   # not change (the menus)
+   def enter(self, scene):
+      if scene == "menu":
+         self.button = draw_game_menu(grid_h, grid_w + 5)
+         stddraw.show(0)
+      elif scene == "playing" and self.scene in [None, "menu"]:
+         self.new_game()
+      elif scene == "help":
+         # the game is stopped while the menu is displayed
+         self.help_return = self.scene
+         self.button = draw_how_to_play(grid_h, grid_w)
+         stddraw.show(0)
+         print("Stop for how to play menu.")
+      elif scene == "game over":
+         self.button = draw_game_over(grid_h, grid_w + 5)
+         stddraw.show(0)
+      self.scene = scene
+
+   # Method that starts a new game (it replaces the current game)
+   def new_game(self):
+      self.game = Game(self.replay, self.turbo)
+      # the keys typed before the game started are not for it
+      stddraw.clearKeysTyped()
+
+   # Method that ends the loop with the given result
+   def stop(self, result):
+      self.done, self.result = True, result
+
+   # Method that runs the scenes until the loop ends, the result is returned
+   def run(self):
+      while not self.done:
+         # the mouse is clicked at most once per iteration
+         click = None
+         if stddraw.mousePressed():
+            click = (stddraw.mouseX(), stddraw.mouseY())
+         if self.scene in ["playing", "paused"]:
+            self.update_game(click)
+         else:
+            self.update_menu(click)
+      return self.result
+
+   # Method that runs an iteration of the menu, the how to play menu or the
+   # game over screen: they wait for a click on their buttons
+   def update_menu(self, click):
+      if click is not None:
+         if self.scene == "help":
+            # the X button of the how to play menu
+            if is_inside(click, self.button):
+               self.scene = self.help_return
+               # the menu is drawn over the game grid
+               self.game.grid.invalidate()
+               self.game.redraw = True
+               # the game continues from where it is stopped (the keys typed
+               # while the menu was displayed are not for the game)
+               self.game.scheduler.reset_gravity(self.game.scheduler.now())
+               stddraw.clearKeysTyped()
+               return
+         elif is_inside(click, self.button):
+            self.enter("menu" if self.scene == "game over" else "playing")
+            return
+      # wait for a short time (50 ms), or until the user interacts
+      stddraw.waitForEvents(50)
+
+   # Method that runs an iteration of the game loop of the playing and the
+   # paused scenes
+   def update_game(self, click):
+      game, replay = self.game, self.replay
+      grid = game.grid
 
       # if mouse pressed at these locations, game print the how to play menu
-      if stddraw.mousePressed():
+      if replay is None and click is not None:
          # check if these coordinates are inside the button
-         if stddraw.mouseX() >= grid_w+1 and stddraw.mouseX() <= grid_w+3:
-            if stddraw.mouseY() >= grid_h-2 and stddraw.mouseY()<= grid_h:
-               menu(grid_h,grid_w)
-               print("Stop for how to play menu.")
-
-      # check user interactions via the keyboard
-      if stddraw.hasNextKeyTyped():
-         key_typed = stddraw.nextKeyTyped()
-
-         # if user press the p key, game will stop
-         if key_typed=='p':
-            print("Pause")
-            if pause:
-               pause = False
-            else:
-               pause = True
-
-         # if users didn't press the p, game will want the press rotation key from users
-         elif not pause:
-
-            # if the left arrow key has been pressed
-            if key_typed == "left":
-               # move the active tetromino left by one
-               current_tetromino.move(key_typed, grid)
-            # if the right arrow key has been pressed
-            elif key_typed == "right":
-               # move the tetromino right by one
-               current_tetromino.move(key_typed, grid)
-            # if the down arrow key has been pressed
-            elif key_typed == "down":
-               # move the active tetromino down by one
-               # (soft drop: causes the tetromino to fall down faster)
-               current_tetromino.move(key_typed*2, grid)
-            # if users want the piece drop, they have to press space button
-            elif key_typed =='space':
-               for i in range(grid_h):
-                  current_tetromino.move('down',grid)
-            # it's for game speed faster
-            elif key_typed=='f':
-               if grid.speed > 60:
-                  grid.speed -=75
-            # it's for game speed slower
-            elif key_typed=='s':
-               if grid.speed < 500:
-                  grid.speed +=75
-            # if users want to rotate the tetromino, they have to press up button
-            elif key_typed == 'up':
-               current_tetromino.rotate(grid)
-
-         # R for restart the game
-         if key_typed=='r':
-            print("Game restarted.")
-            start()
-
-         # clear the queue that stores all the keys pressed/typed
+         if is_inside(click, (grid_w + 1, grid_h - 2, 2, 2)):
+            return self.enter("help")
+
+      # check user interactions via the keyboard, all the keys typed since the
+      # last iteration are handled in the order they were typed (the keys of
+      # a replay are handled at the same gravity ticks as they were typed)
+      if replay is None:
+         keys_typed = []
+         while stddraw.hasNextKeyTyped():
+            keys_typed.append(stddraw.nextKeyTyped())
+      else:
          stddraw.clearKeysTyped()
+         keys_typed = replay.get_keys(game.tick)
+      # when the auto player is on, it gives the keys that place each new
+      # tetromino (they are handled and recorded as the keys of the user), the
+      # keys are searched in the background for at most a gravity interval
+      # and handled once they are found (they are dropped if the tetromino
+      # was locked in the meantime)
+      if replay is None and autoplay and self.scene == "playing" and \
+            not grid.game_over:
+         player = get_autoplayer()
+         if player.is_searching():
+            keys = player.poll()
+            if keys is not None and grid.current_tetromino is game.planned:
+               keys_typed.extend(keys)
+         if not player.is_searching() and \
+               grid.current_tetromino is not game.planned:
+            player.start(grid, grid.speed / 1000)
+            game.planned = grid.current_tetromino
+      if not self.handle_keys(keys_typed):
+         return
+      if self.replay_ended():
+         return self.stop(end_replay(replay, game.tick))
 
-      # move the active tetromino down by one at each iteration (auto fall)
-      if not pause:
-         success = current_tetromino.move("down", grid)
-
-      # place the tetromino on the game grid when it cannot go down anymore
-      if not success and not pause:
-         # get the tile matrix of the tetromino without empty rows and columns
-         # and the position of the bottom left cell in this matrix
-         tiles_to_place = current_tetromino.tile_matrix
-         # update the game grid by locking the tiles of the landed tetromino
-         game_over = grid.update_grid(tiles_to_place)
-         # end the main game loop if the game is over
-         if game_over:
-            if display_game_over(grid_h,grid_w+5):
-               pause = True
-               start()
-
-         # create the next tetromino to enter the game grid
-         # by using the create_tetromino function defined below
-         current_tetromino = next_tetromino
-         grid.current_tetromino = current_tetromino
-         # print the next tetromino at the terminal
-         print("Next Tetromino:")
-         next_tetromino = create_tetromino(grid_h, grid_w)
-         grid.next_tetromino = next_tetromino
-         next_tetromino.draw_next_tetro()
+      # move the active tetromino down by one at each gravity tick (auto
+      # fall), the tetromino is locked and the next one enters the game grid
+      # when it cannot go down anymore (in turbo mode a gravity tick is run at
+      # each iteration without waiting for it)
+      scheduler = game.scheduler
+      now = scheduler.now()
+      scheduler.gravity_interval = grid.speed
+      if self.scene == "paused":
+         scheduler.reset_gravity(now)
+         ticks = 0
+      elif self.turbo:
+         ticks = 1
+      else:
+         ticks = scheduler.gravity_ticks(now)
+      for i in range(ticks):
+         # the keys of a replay that were typed before this gravity tick are
+         # handled before it, as they were when the game was recorded (a hard
+         # drop above may have run a gravity tick already)
+         if replay is not None:
+            if not self.handle_keys(replay.get_keys(game.tick)):
+               return
+            if self.replay_ended():
+               return self.stop(end_replay(replay, game.tick))
+            if self.scene == "paused":
+               break
+         if not self.run_tick():
+            return
 
       # display the game grid and as well the current tetromino
-      grid.display(pause)
+      if game.redraw and (self.turbo or scheduler.frame_due(now)):
+         if profiler.is_installed():
+            grid.hud = profiler.get_report()
+         else:
+            grid.hud = None
+         grid.display(self.scene == "paused")
+         if profiler.is_installed():
+            profiler.end_frame()
+         game.redraw = False
+
+      # wait for the next gravity tick or frame, or until the user interacts
+      if not self.turbo:
+         now = scheduler.now()
+         wait = scheduler.time_until_next(now, game.redraw)
+         # while the auto player is searching, the loop checks its result at
+         # least every autoplay_poll_interval ms
+         if autoplayer is not None and autoplayer.is_searching():
+            wait = min(wait, autoplay_poll_interval)
+         stddraw.waitForEvents(wait)
+
+   # Method that runs a gravity tick of the game, returns False if the game is
+   # over (the game over scene is entered or the replay ends)
+   def run_tick(self):
+      game, replay = self.game, self.replay
+      grid = game.grid
+      success = grid.step()
+      game.tick += 1
+      game.redraw = True
+      # end the game if it is over
+      if not success and grid.game_over:
+         if replay is not None:
+            grid.display(self.scene == "paused")
+            self.stop(end_replay(replay, game.tick))
+            return False
+         game.finish()
+         # print a message on the console when the game is over
+         print("Game over")
+         grid.display(False)
+         self.enter("game over")
+         return False
+      return True
+
+   # Method that handles the given keys typed in the playing or the paused
+   # scene in order (they are recorded), returns False if the game is
+   # restarted or ended by a key (the keys after it are not for the new game)
+   def handle_keys(self, keys_typed):
+      game = self.game
+      for key_typed in keys_typed:
+         game.redraw = True
+         if game.recording is not None:
+            game.recording.record(game.tick, key_typed)
+         if not self.handle_key(key_typed):
+            return False
+      return True
+
+   # Method that returns True if the replay being played back ends here: all
+   # of its keys are played back and the game reached the end of the replay,
+   # or it is paused (a replay without its end)
+   def replay_ended(self):
+      replay = self.replay
+      if replay is None or not replay.is_played():
+         return False
+      if replay.end_tick is None:
+         return self.scene == "paused"
+      return self.game.tick >= replay.end_tick or self.scene == "paused"
+
+   # Method that handles the given key typed in the playing or the paused
+   # scene, returns False if the game is restarted or ended by the key
+   def handle_key(self, key_typed):
+      global autoplay
+      game, replay = self.game, self.replay
+      grid = game.grid
+
+      # if user press the p key, game will stop
+      if key_typed=='p':
+         print("Pause")
+         if self.scene == "paused":
+            self.scene = "playing"
+         else:
+            self.scene = "paused"
 
-   # print a message on the console when the game is over
-   print("Game over")
+      # F3 shows or hides the performance overlay (the frame rate and the
+      # time spent in each phase of the frames)
+      elif key_typed == 'f3':
+         if profiler.is_installed():
+            profiler.uninstall()
+         else:
+            profiler.install()
 
-# Method for the how to play menu on the right side of grid
-def menu(grid_height, grid_width):
+      # A turns the auto player on or off
+      elif key_typed == 'a' and replay is None:
+         autoplay = not autoplay
+         game.planned = None
+         print("Auto player", "on" if autoplay else "off")
+
+      # F5 saves the game and F9 loads the saved game
+      elif key_typed == 'f5' and replay is None:
+         snapshot.save(grid, get_save_path())
+         print("Game saved.")
+      elif key_typed == 'f9' and replay is None:
+         score = grid.score
+         try:
+            snapshot.load(get_save_path(), grid)
+         except (OSError, ValueError) as error:
+            print("The game cannot be loaded:", error)
+         else:
+            print("Game loaded.")
+            # the replay cannot reproduce a loaded game, so it ends here (with
+            # the score before the game is loaded)
+            game.finish(score)
+            grid.invalidate()
+            game.planned = None
+
+      # if users didn't press the p, game will want the press rotation key from users
+      elif self.scene == "playing":
+
+         # if the left or the right arrow key has been pressed
+         if key_typed == "left" or key_typed == "right":
+            # move the active tetromino left/right by one
+            grid.move(key_typed)
+         # if the down arrow key has been pressed
+         elif key_typed == "down":
+            # move the active tetromino down by one
+            # (soft drop: causes the tetromino to fall down faster)
+            grid.move(key_typed)
+         # if users want the piece drop, they have to press space button
+         elif key_typed =='space':
+            grid.drop()
+            # hard drop: the tetromino is locked at once by a gravity tick and
+            # the next tetromino gets a whole gravity interval
+            if not self.run_tick():
+               return False
+            game.scheduler.reset_gravity(game.scheduler.now())
+         # it's for game speed faster
+         elif key_typed=='f':
+            if grid.speed > 75:
+               grid.speed -=75
+         # it's for game speed slower
+         elif key_typed=='s':
+            if grid.speed < 500:
+               grid.speed +=75
+         # if users want to rotate the tetromino, they have to press up button
+         elif key_typed == 'up':
+            grid.rotate()
+
+      # R for restart the game (a new game replaces the current one)
+      if key_typed=='r':
+         if replay is not None:
+            self.stop(end_replay(replay, game.tick))
+            return False
+         game.finish()
+         print("Game restarted.")
+         self.new_game()
+         self.scene = "playing"
+         return False
+      return True
+
+# Function that returns True if the given (x, y) position is inside the given
+# (x, y, w, h) rectangle
+def is_inside(position, rectangle):
+   x, y, w, h = rectangle
+   return x <= position[0] <= x + w and y <= position[1] <= y + h
+
+# Function that returns the auto player (it is created when it is first used,
+# since it starts a pool of processes)
+def get_autoplayer():
+   global autoplayer
+   if autoplayer is None:
+      autoplayer = AutoPlayer()
+   return autoplayer
+
+# Function that returns the path of the file the replay of a game with the
+# given seed is recorded to
+def get_replay_path(seed):
+   directory = os.path.dirname(os.path.realpath(__file__))
+   name = time.strftime("%Y%m%d-%H%M%S") + "-" + str(seed) + ".replay"
+   return os.path.join(directory, "replays", name)
+
+# Function that returns the path of the file the game is saved to
+def get_save_path():
+   directory = os.path.dirname(os.path.realpath(__file__))
+   return os.path.join(directory, "saves", "quicksave.snapshot")
+
+# Function that is called when the given replay is played back until the given
+# number of gravity ticks, it prints whether the game is reproduced and returns
+# the final score
+def end_replay(replay, tick):
+   print("Replay ended after", tick, "gravity ticks with the score", grid.score)
+   if replay.end_tick is not None:
+      if (tick, grid.score) == (replay.end_tick, replay.end_score):
+         print("The recorded game is reproduced.")
+      else:
+         print("The recorded game ended after", replay.end_tick,
+               "gravity ticks with the score", replay.end_score)
+   return grid.score
+
+# Method for drawing the how to play menu on the right side of grid, the X
+# button that closes it is returned as (x, y, w, h)
+def draw_how_to_play(grid_height, grid_width):
    stddraw.setPenColor(Color(147, 123, 110))
    stddraw.filledRectangle(grid_width-0.35 , grid_width - 5, 4.75,6)
    stddraw.setPenColor(Color(243, 178, 122))
@@ -146,32 +447,11 @@ def menu(grid_height, grid_width):
    stddraw.text(grid_width + 2, grid_height - 8.5, "Press Space for Drop")
    stddraw.text(grid_width + 2, grid_height - 9.5, "Press F for Speed Up")
    stddraw.text(grid_width + 2, grid_height - 10.5, "Press S for Speed Down")
+   return (grid_width + 3.4, grid_height - 6, 1.1, 1)
 
-   while True:
-      # display the menu and wait for a short time (50 ms)
-      stddraw.show(50)
-      # check if the mouse has been left-clicked on the button
-      if stddraw.mousePressed():
-         # get the x and y coordinates of the location at which the mouse has
-         # most recently been left-clicked
-         mouse_x, mouse_y = stddraw.mouseX(), stddraw.mouseY()
-         # check if these coordinates are inside the button
-         if mouse_x >= grid_width+3.4  and mouse_x <= grid_width+4.5:
-            if mouse_y >= grid_height-6 and mouse_y <= grid_height-5:
-               break # break the loop to return game
-
-# Function for creating random shaped tetrominoes to enter the game grid
-def create_tetromino(grid_height, grid_width):
-   # type (shape) of the tetromino is determined randomly
-   tetromino_types = [ "S", "T","J",'L','O','Z','I']
-   random_index = random.randint(0, len(tetromino_types) - 1)
-   random_type = tetromino_types[random_index]
-   # create and return the tetromino
-   tetromino = Tetromino(random_type, grid_height, grid_width)
-   return tetromino
-
-# Function for displaying a simple menu before starting the game
-def display_game_menu(grid_height, grid_width):
+# Function for drawing a simple menu before starting the game, the start game
+# button is returned as (x, y, w, h)
+def draw_game_menu(grid_height, grid_width):
    # colors used for the menu
    background_color = Color(0, 0, 0)
    button_color = Color(194, 24, 27)
@@ -221,21 +501,11 @@ def display_game_menu(grid_height, grid_width):
    stddraw.setPenColor(text_color)
    text_to_display = "Click Here to Start the Game"
    stddraw.text(img_center_x, 5, text_to_display)
-   # menu interaction loop
-   while True:
-      # display the menu and wait for a short time (50 ms)
-      stddraw.show(50)
-      # check if the mouse has been left-clicked
-      if stddraw.mousePressed():
-         # get the x and y coordinates of the location at which the mouse has
-         # most recently been left-clicked
-         mouse_x, mouse_y = stddraw.mouseX(), stddraw.mouseY()
-         if mouse_x >= button_blc_x and mouse_x <= button_blc_x + button_w:
-            if mouse_y >= button_blc_y and mouse_y <= button_blc_y + button_h:
-               break # break the loop to end the method and start the game
-
-# Method for the display a game over menu with grid height and grid width
-def display_game_over(grid_height, grid_width):
+   return (button_blc_x, button_blc_y, button_w, button_h)
+
+# Method for drawing a game over menu with grid height and grid width, the
+# button that goes to the main menu is returned as (x, y, w, h)
+def draw_game_over(grid_height, grid_width):
    # colors used for the game over screen
    button_color = Color(194, 24, 27)
    text_color = Color(255, 255, 255)
@@ -274,37 +544,47 @@ def display_game_over(grid_height, grid_width):
    stddraw.text(img_center_x, 5.6, text_to_display)
    stddraw.text(img_center_x, 5.1, "Score : " + str(grid.score))
    stddraw.text(img_center_x, 4.4, "Click Here to Main Menu")
-   # game over menu interaction loop
-   while True:
-      # display the menu and wait for a short time (50 ms)
-      stddraw.show(50)
-      # check if the mouse has been left-clicked
-      if stddraw.mousePressed():
-         # get the x and y coordinates of the location at which the mouse has
-         # most recently been left-clicked
-         mouse_x, mouse_y = stddraw.mouseX(), stddraw.mouseY()
-         if mouse_x >= button_blc_x and mouse_x <= button_blc_x + button_w:
-            if mouse_y >= button_blc_y and mouse_y <= button_blc_y + button_h:
-               display_game_menu(grid_height,grid_width)
-               start() # break the loop to end the method and start the game
-
-# Method for create a canvas for game
-def canvas():
+   return (button_blc_x, button_blc_y, button_w, button_h)
+
+# Method for create a canvas for game with the given grid dimensions, the game
+# is played by the auto player if auto_play is True
+def canvas(grid_height=18, grid_width=12, auto_play=False):
    # set the dimensions of the game grid
    global grid_h, grid_w
-   grid_h, grid_w = 18, 12
-   # set the size of the drawing canvas
-   canvas_h, canvas_w = 40 * grid_h, 60 * grid_w
-   stddraw.setCanvasSize(canvas_w, canvas_h)
-   # set the scale of the coordinate system
-   stddraw.setXscale(-0.5, grid_w + 4.5)
-   stddraw.setYscale(-0.5, grid_h - 0.5)
-   # display a simple menu before opening the game
-   # by using the display_game_menu function defined below
-   display_game_menu(grid_h, grid_w + 5)
+   grid_h, grid_w = grid_height, grid_width
+   # set the key repeat delay and interval (in ms) for the arrow keys
+   global key_repeat_delay, key_repeat_interval
+   key_repeat_delay, key_repeat_interval = 170, 50
+   # create the profiler used for the performance overlay (hidden at first)
+   global profiler
+   profiler = Profiler()
+   # each game is recorded as a replay in the replays directory
+   global record_replays
+   record_replays = True
+   # the auto player places the tetrominoes while autoplay is True (it can be
+   # turned on or off with the A key), the results of its searches are
+   # checked every autoplay_poll_interval ms
+   global autoplay, autoplayer, autoplay_poll_interval
+   autoplay, autoplayer, autoplay_poll_interval = auto_play, None, 10
+   # set the size and the scale of the drawing canvas
+   setup_canvas(grid_h, grid_w)
 
 # start() function is specified as the entry point (main function) from which
 # the program starts execution
 if __name__== '__main__':
-   canvas()
-   start()
\ No newline at end of file
+   parser = argparse.ArgumentParser(description="Tetris 2048 Game")
+   parser.add_argument("--replay", metavar="FILE",
+                       help="play back the game recorded in the replay file")
+   parser.add_argument("--turbo", action="store_true",
+                       help="play the replay back as fast as possible")
+   parser.add_argument("--autoplay", action="store_true",
+                       help="let the auto player play the game")
+   args = parser.parse_args()
+   if args.replay is None:
+      canvas(auto_play=args.autoplay)
+      # display a simple menu before opening the game
+      start(show_menu=True)
+   else:
+      replay = Replay.load(args.replay)
+      canvas(replay.grid_h, replay.grid_w)
+      start(replay, args.turbo)
\ No newline at end of file
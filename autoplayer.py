@@ -0,0 +1,215 @@
+import numpy as np  # fundamental Python module for scientific computing
+import multiprocessing  # used for searching the placements on all cores
+import time  # used for the time limit of the search
+
+# Function that makes the given tetromino the current tetromino of the given
+# game engine, rotates it the given number of turns, moves it horizontally by
+# dx and drops it. Returns False if the tetromino cannot be moved this way.
+def drop(engine, tetromino, turns, dx):
+   engine.current_tetromino = tetromino
+   for i in range(turns):
+      if not engine.rotate():
+         return False
+   direction = "left" if dx < 0 else "right"
+   for i in range(abs(dx)):
+      if not engine.move(direction):
+         return False
+   engine.drop()
+   return True
+
+# Function that returns all the placements (turns, dx) of the given tetromino
+# that may be possible on a game grid with the given width
+def get_placements(tetromino, grid_width):
+   x = tetromino.bottom_left_cell.x
+   # a tetromino can be at most 3 columns out of the game grid (the empty
+   # columns of its tile matrix)
+   return [(turns, dx) for turns in range(4)
+           for dx in range(-x - 3, grid_width - x)]
+
+# Function that returns the value of the given game engine after a placement
+# that increased the score by score_gain, the placements that end the game
+# have the lowest value
+def evaluate(engine, score_gain, weights):
+   if engine.game_over:
+      return -np.inf
+   occupied = engine.tile_matrix != 0
+   grid_h = engine.grid_height
+   # the height of each column (the row above its topmost tile)
+   heights = np.where(occupied.any(axis=0),
+                      grid_h - occupied[::-1].argmax(axis=0), 0)
+   # the empty cells below the topmost tile of their columns
+   holes = int((np.arange(grid_h)[:, None] < heights).sum() - occupied.sum())
+   bumpiness = int(np.abs(np.diff(heights)).sum())
+   return (weights["score"] * score_gain + weights["height"] * heights.sum() +
+           weights["max_height"] * heights.max() + weights["holes"] * holes +
+           weights["bumpiness"] * bumpiness)
+
+# Function that returns the best (value, placement) pair for the given first
+# placements of the current tetromino of the given game engine, the value of
+# a placement is the value of the best placement of the next tetromino after
+# it (if lookahead is True). It is run in the worker processes. After the
+# given deadline (a time.time() value, None = no time limit) the best
+# placement found so far is returned.
+def search(engine, first_placements, lookahead, weights, deadline=None):
+   best = (-np.inf, None)
+   # the placements that end with the tetromino on the same cells as an
+   # earlier one are skipped
+   seen = set()
+   for turns, dx in first_placements:
+      if deadline is not None and best[1] is not None and \
+            time.time() > deadline:
+         break
+      first = engine.copy()
+      tetromino = first.current_tetromino
+      if not drop(first, tetromino, turns, dx):
+         continue
+      cells = tuple(sorted(tetromino.get_cells()))
+      if cells in seen:
+         continue
+      seen.add(cells)
+      # lock the tetromino and apply the rules of the game
+      first.update_grid(tetromino)
+      if not lookahead or first.game_over:
+         value = evaluate(first, first.score - engine.score, weights)
+      else:
+         value = -np.inf
+         next_seen = set()
+         for next_turns, next_dx in get_placements(engine.next_tetromino,
+                                                   engine.grid_width):
+            second = first.copy()
+            tetromino = engine.next_tetromino.copy()
+            if not drop(second, tetromino, next_turns, next_dx):
+               continue
+            cells = tuple(sorted(tetromino.get_cells()))
+            if cells in next_seen:
+               continue
+            next_seen.add(cells)
+            second.update_grid(tetromino)
+            value = max(value, evaluate(second, second.score - engine.score,
+                                        weights))
+      if best[1] is None or value > best[0]:
+         best = (value, (turns, dx))
+   return best
+
+# Function that returns the keys that make the given placement (turns, dx) of
+# the current tetromino (None = just drop it)
+def get_placement_keys(placement):
+   if placement is None:
+      return ["space"]
+   turns, dx = placement
+   direction = "left" if dx < 0 else "right"
+   return ["up"] * turns + [direction] * abs(dx) + ["space"]
+
+# Class used for playing the game automatically: for each tetromino, every
+# placement (rotation and horizontal position) of it and of the next tetromino
+# is tried out on a copy of the game engine, the resulting game grids are
+# scored and the placement that leads to the best one is chosen. The search is
+# split across a pool of processes, and it can run in the background while the
+# game goes on (see start and poll).
+class AutoPlayer:
+   # the weights of the features of the game grids used for scoring them
+   default_weights = {"score": 0.05, "height": -0.5, "max_height": -0.5,
+                      "holes": -4.0, "bumpiness": -0.4}
+
+   # Constructor that creates an auto player that searches with the given
+   # number of processes (None = the number of the cores, 0 = no pool) and
+   # looks ahead to the next tetromino if lookahead is True
+   def __init__(self, processes=None, lookahead=True, weights=None):
+      if processes is None:
+         processes = multiprocessing.cpu_count()
+      self.processes = processes
+      self.lookahead = lookahead
+      self.weights = dict(AutoPlayer.default_weights)
+      if weights is not None:
+         self.weights.update(weights)
+      self.pool = multiprocessing.Pool(processes) if processes > 0 else None
+      # the results of the search that is running (or finished but not
+      # collected yet), None if there is none
+      self.pending = None
+
+   # Method that stops the processes of the pool
+   def close(self):
+      if self.pool is not None:
+         self.pool.close()
+         self.pool.join()
+         self.pool = None
+
+   # Method that starts searching the best placement of the current tetromino
+   # of the given game engine, the search ends after the given time limit in
+   # seconds (None = no time limit). The search runs in the background in the
+   # processes of the pool (without a pool it is done here).
+   def start(self, engine, time_limit=None):
+      engine = engine.copy()
+      engine.generator = None  # not needed for the search
+      placements = get_placements(engine.current_tetromino, engine.grid_width)
+      deadline = None if time_limit is None else time.time() + time_limit
+      if self.pool is None:
+         self.pending = [search(engine, placements, self.lookahead,
+                                self.weights, deadline)]
+         return
+      # split the placements into one chunk for each process
+      chunks = [placements[i::self.processes] for i in range(self.processes)]
+      self.pending = self.pool.starmap_async(
+         search, [(engine, chunk, self.lookahead, self.weights, deadline)
+                  for chunk in chunks])
+
+   # Method that returns True if a search is started and its placement is not
+   # collected yet
+   def is_searching(self):
+      return self.pending is not None
+
+   # Method that returns True if the started search is finished
+   def is_ready(self):
+      if self.pending is None:
+         return False
+      return self.pool is None or self.pending.ready()
+
+   # Method that returns the best placement (turns, dx) found by the started
+   # search (None if there is none), it waits for the search to finish
+   def get_placement(self):
+      results = self.pending if self.pool is None else self.pending.get()
+      self.pending = None
+      results = [result for result in results if result[1] is not None]
+      if not results:
+         return None
+      return max(results, key=lambda result: result[0])[1]
+
+   # Method that returns the keys of the placement found by the started search
+   # if it is finished, None otherwise (it does not wait)
+   def poll(self):
+      if not self.is_ready():
+         return None
+      return get_placement_keys(self.get_placement())
+
+   # Method that returns the best placement (turns, dx) of the current
+   # tetromino of the given game engine (None if there is none), searched for
+   # at most the given time limit in seconds
+   def choose(self, engine, time_limit=None):
+      self.start(engine, time_limit)
+      return self.get_placement()
+
+   # Method that returns the keys that make the chosen placement of the current
+   # tetromino of the given game engine
+   def get_keys(self, engine, time_limit=None):
+      return get_placement_keys(self.choose(engine, time_limit))
+
+   # Method that plays the game on the given game engine headless until the
+   # game is over (or max_pieces tetrominoes are placed), the number of the
+   # placed tetrominoes is returned
+   def play(self, engine, max_pieces=None):
+      if engine.current_tetromino is None:
+         engine.spawn()
+      pieces = 0
+      while not engine.game_over and (max_pieces is None or
+                                      pieces < max_pieces):
+         for key in self.get_keys(engine):
+            if key == "up":
+               engine.rotate()
+            elif key == "space":
+               # hard drop: the tetromino is dropped and locked at once
+               engine.drop()
+               engine.step()
+            else:
+               engine.move(key)
+         pieces += 1
+      return pieces
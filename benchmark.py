@@ -0,0 +1,190 @@
+'''
+Benchmarks for the rules of the game and the rendering primitives
+
+Usage: python benchmark.py [--output results.json] [--compare old.json]
+
+The rendering benchmarks run on an offscreen canvas of stddraw (no window is
+opened) on the grid size of the game. The results are written as JSON so that
+the results of two commits can be compared with the --compare option.
+'''
+
+import os  # used for finding the directory of the repository
+from game_grid import GameGrid, setup_canvas  # the game grid and its canvas
+from tile import Tile  # the class for modeling the numbered tiles
+from point import Point  # used for tile positions
+import numpy as np  # fundamental Python module for scientific computing
+import argparse  # used for parsing the command line arguments
+import json  # used for writing and reading the results
+import platform  # used for describing the machine the results are from
+import subprocess  # used for finding the current commit
+import time  # used for measuring the elapsed time
+
+# the grid sizes (grid_h, grid_w) and the fill levels (the fraction of the
+# occupied cells) of the board fixtures
+grid_sizes = [(18, 12), (24, 16), (40, 30)]
+fill_levels = [0.1, 0.4, 0.7]
+# the grid size used for the rendering benchmarks (the size of the game), the
+# canvas of stddraw cannot be resized once it is created
+render_grid_size = (18, 12)
+
+# Function that returns a board fixture (the tile exponents of the grid) with
+# the given size and fill level created by using the given seed: the cells of
+# the bottom rows are occupied with the given probability (the top rows are
+# left empty for the tetrominoes) and two of these rows are full
+def create_board(grid_h, grid_w, fill, seed):
+   rng = np.random.default_rng(seed)
+   board = np.zeros((grid_h, grid_w), dtype=np.uint8)
+   rows = grid_h - 6
+   occupied = rng.random((rows, grid_w)) < fill
+   board[:rows][occupied] = rng.integers(1, 5, size=int(occupied.sum()))
+   for row in rng.choice(rows, size=2, replace=False):
+      board[row] = rng.integers(1, 5, size=grid_w)
+   return board
+
+# Function that returns a game grid with the given board and its current
+# tetromino dropped onto the board
+def create_grid(board, seed):
+   grid = GameGrid(len(board), len(board[0]), seed)
+   grid.tile_matrix = board.copy()
+   grid.spawn()
+   grid.drop()
+   return grid
+
+# Function that runs the given function the given number of times and returns
+# the statistics of the run times in microseconds, the setup function (if any)
+# is run before each run and it is not timed
+def measure(run, number, setup=None):
+   times = []
+   for i in range(number):
+      if setup is not None:
+         setup()
+      start = time.perf_counter()
+      run()
+      times.append((time.perf_counter() - start) * 1e6)
+   times.sort()
+   return {"number": number, "mean_us": sum(times) / number,
+           "median_us": times[number // 2], "min_us": times[0],
+           "max_us": times[-1]}
+
+# Function that returns the benchmarks of the rules of the game on the given
+# board fixture as (name, run, setup) triples
+def rule_benchmarks(board, seed):
+   grid = create_grid(board, seed)
+   tetromino = grid.current_tetromino
+   position = tetromino.bottom_left_cell
+   orientation = tetromino.orientation
+   # restore the board and the current tetromino of the fixture
+   def reset():
+      grid.tile_matrix = board.copy()
+      grid.occupancy = None
+      grid.game_over = False
+      tetromino.bottom_left_cell = position
+      tetromino.orientation = orientation
+      grid.current_tetromino = tetromino
+   # move the tetromino back and forth so that it stays around its position
+   directions = ["left", "right"]
+   def move():
+      tetromino.move(directions[0], grid)
+      directions.reverse()
+   return [
+      ("GameGrid.update_grid", lambda: grid.update_grid(tetromino), reset),
+      ("GameGrid.merge", grid.merge, reset),
+      ("GameGrid.check_grid", grid.check_grid, reset),
+      ("GameGrid.delete_tile", grid.delete_tile, reset),
+      ("Tetromino.move", move, None),
+      ("Tetromino.rotate", lambda: tetromino.rotate(grid), None),
+      ("Tetromino.can_be_moved", lambda: tetromino.can_be_moved("down", grid),
+       None),
+   ]
+
+# Function that returns the benchmarks of the rendering on the given board
+# fixture as (name, run, setup) triples
+def render_benchmarks(board, seed):
+   grid = create_grid(board, seed)
+   grid.display(False)
+   tiles = [Tile(Point(col, row), 2 ** (col % 11 + 1))
+            for row in range(2) for col in range(len(board[0]))]
+   def draw_tiles():
+      for tile in tiles:
+         tile.draw()
+   # a frame in which the current tetromino moved by one (only the changed
+   # cells are repainted)
+   directions = ["left", "right"]
+   def move_frame():
+      grid.move(directions[0])
+      directions.reverse()
+      grid.display(False)
+   return [
+      ("Tile.draw x%d" % len(tiles), draw_tiles, None),
+      ("GameGrid.display full", lambda: grid.display(False), grid.invalidate),
+      ("GameGrid.display move", move_frame, None),
+   ]
+
+# Function that runs all the benchmarks and returns the results as a list of
+# dictionaries, the numbers of runs are multiplied by the given scale
+def run_benchmarks(scale=1.0):
+   results = []
+   setup_canvas(*render_grid_size, offscreen=True)
+   for grid_h, grid_w in grid_sizes:
+      for fill in fill_levels:
+         seed = grid_h * 1000 + grid_w * 10 + int(fill * 10)
+         board = create_board(grid_h, grid_w, fill, seed)
+         groups = [("rules", rule_benchmarks(board, seed), 500)]
+         if (grid_h, grid_w) == render_grid_size:
+            groups.append(("render", render_benchmarks(board, seed), 50))
+         for group, benchmarks, number in groups:
+            for name, run, setup in benchmarks:
+               result = {"name": name, "group": group, "grid_h": grid_h,
+                         "grid_w": grid_w, "fill": fill, "seed": seed}
+               result.update(measure(run, max(1, int(number * scale)), setup))
+               results.append(result)
+               print("%-28s %3dx%-3d fill %.1f %12.1f us" % (name, grid_h,
+                     grid_w, fill, result["median_us"]), flush=True)
+   return results
+
+# Function that returns the current commit of the repository (None if it is
+# not known)
+def get_commit():
+   try:
+      return subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                            capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__))
+                            ).stdout.strip()
+   except (OSError, subprocess.CalledProcessError):
+      return None
+
+# Function that prints the ratio of the median times of the given results to
+# the median times of the same benchmarks in the given baseline results
+def compare(results, baseline):
+   def key(result):
+      return (result["name"], result["grid_h"], result["grid_w"],
+              result["fill"])
+   old = {key(result): result for result in baseline["results"]}
+   print("compared with", baseline.get("commit"))
+   for result in results:
+      if key(result) in old:
+         ratio = result["median_us"] / old[key(result)]["median_us"]
+         print("%-28s %3dx%-3d fill %.1f %8.2fx" % (key(result) + (ratio,)))
+
+# Main function where the benchmarks start execution
+def main():
+   parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+   parser.add_argument("--output", default="benchmark_results.json",
+                       help="the JSON file the results are written to")
+   parser.add_argument("--compare", metavar="JSON",
+                       help="results of an earlier run to compare with")
+   parser.add_argument("--scale", type=float, default=1.0,
+                       help="multiplier for the number of runs")
+   args = parser.parse_args()
+   results = run_benchmarks(args.scale)
+   report = {"commit": get_commit(), "python": platform.python_version(),
+             "machine": platform.platform(), "results": results}
+   with open(args.output, "w") as file:
+      json.dump(report, file, indent=1)
+   print("results written to", args.output)
+   if args.compare:
+      with open(args.compare) as file:
+         compare(results, json.load(file))
+
+if __name__ == '__main__':
+   main()
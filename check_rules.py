@@ -0,0 +1,255 @@
+'''
+Equivalence checks of the optimized rules of the game
+
+Usage: python check_rules.py [--boards 1000] [--seed 0]
+
+The rules of the game are compared on random boards with straightforward cell
+by cell versions of them, written as the game first implemented them, and the
+frames that GameGrid.display repaints partially are compared with full frames
+on an offscreen canvas of stddraw (no window is opened). The snapshots of the
+games must restore them exactly, and corrupt snapshots must be rejected with a
+ValueError that leaves the game engine unchanged. Each check prints the
+number of the boards (or frames) it tried and the mismatches it found, and the
+exit status is 1 if any check found a mismatch.
+'''
+
+import lib.stddraw as stddraw  # stddraw is used as a basic graphics library
+from game_engine import GameEngine  # the rules of the game
+from game_grid import GameGrid, setup_canvas  # the game grid and its canvas
+from tetromino import Tetromino, shapes  # the shapes of the tetrominoes
+from point import Point  # used for tile positions
+import snapshot  # the snapshots of the games
+import numpy as np  # fundamental Python module for scientific computing
+import argparse  # used for parsing the command line arguments
+import sys  # used for the exit status
+
+# the grid size of the games of the frames check (the size of the game), the
+# canvas of stddraw cannot be resized once it is created
+frame_grid_size = (18, 12)
+
+# Function that returns a random board (the tile exponents of the grid) with
+# the given size created by using the given random generator: a random number
+# of the bottom rows is filled with a random fill level, with small exponents
+# so that there are many equal tiles, and the cells can be floating
+def random_board(rng, grid_h, grid_w):
+   board = np.zeros((grid_h, grid_w), dtype=np.uint8)
+   rows = rng.integers(1, grid_h + 1)
+   occupied = rng.random((rows, grid_w)) < rng.uniform(0.1, 0.9)
+   board[:rows][occupied] = rng.integers(1, 4, size=int(occupied.sum()))
+   return board
+
+# Function that merges the equal tiles on top of each other on a copy of the
+# given board as the game first did: the rows are scanned from the bottom and
+# the columns from the left, the first pair of equal tiles is merged, the tiles
+# above it move down by one and the scan starts over. Returns the board, the
+# score gained and the number of the merges.
+def reference_merge(board):
+   board = board.copy()
+   score, merges = 0, 0
+   merged = True
+   while merged:
+      merged = False
+      for row in range(len(board) - 1):
+         for col in range(len(board[0])):
+            if board[row][col] != 0 and board[row][col] == board[row + 1][col]:
+               board[row][col] += 1
+               score += 2 ** int(board[row][col])
+               merges += 1
+               # delete the upper tile by moving the tiles above it down
+               board[row + 1:-1, col] = board[row + 2:, col]
+               board[-1][col] = 0
+               merged = True
+               break
+         if merged:
+            break
+   return board, score, merges
+
+# Function that compares GameEngine.merge with reference_merge on the given
+# number of random boards, the number of the mismatches is returned
+def check_merge(boards, rng):
+   mismatches = 0
+   for i in range(boards):
+      grid_h, grid_w = rng.integers(4, 25), rng.integers(4, 17)
+      board = random_board(rng, grid_h, grid_w)
+      engine = GameEngine(grid_h, grid_w)
+      engine.tile_matrix = board.copy()
+      merges = engine.merge()
+      expected = reference_merge(board)
+      if not (engine.tile_matrix == expected[0]).all() or \
+            (engine.score, merges) != expected[1:]:
+         mismatches += 1
+   return mismatches
+
+# Function that returns True if the tiles of a tetromino fit on the given board
+# at the given (x, y) cells as the game first checked it tile by tile: each
+# tile must be inside the walls and above the bottom of the game grid and its
+# cell must be empty (the cells above the game grid are empty)
+def reference_fits(board, cells):
+   grid_h, grid_w = board.shape
+   for x, y in cells:
+      if x < 0 or x >= grid_w or y < 0:
+         return False
+      if y < grid_h and board[y][x] != 0:
+         return False
+   return True
+
+# Function that returns the (x, y) cells of the tiles of the given tetromino
+# after moving it in the given direction or rotating it (direction = "up") as
+# the game first did: each tile is rotated clockwise around the center of the
+# n x n tile matrix of the tetromino (None = the cells where it is)
+def reference_cells(tetromino, direction=None):
+   cells = [(x, y) for x, y, exponent in tetromino.get_cells()]
+   if direction is None:
+      return cells
+   if direction == "left":
+      return [(x - 1, y) for x, y in cells]
+   if direction == "right":
+      return [(x + 1, y) for x, y in cells]
+   if direction == "down":
+      return [(x, y - 1) for x, y in cells]
+   n = shapes[tetromino.type][0]
+   center_x = tetromino.bottom_left_cell.x + (n - 1) / 2
+   center_y = tetromino.bottom_left_cell.y + (n - 1) / 2
+   return [(int(center_x + (y - center_y)), int(center_y - (x - center_x)))
+           for x, y in cells]
+
+# Function that compares the moves and the rotations of the tetrominoes (the
+# collision checks with the occupancy bitmasks, see Tetromino.fits) with
+# reference_fits for a tetromino placed randomly on each of the given number
+# of random boards, the number of the boards with a mismatch is returned
+def check_collisions(boards, rng):
+   mismatches = 0
+   for i in range(boards):
+      grid_h, grid_w = rng.integers(4, 25), rng.integers(4, 17)
+      board = random_board(rng, grid_h, grid_w)
+      engine = GameEngine(grid_h, grid_w, int(rng.integers(2 ** 32)))
+      engine.tile_matrix = board.copy()
+      tetromino = engine.spawn()
+      # place the tetromino where it fits (it can be above the game grid)
+      tetromino.type = Tetromino.types[rng.integers(len(Tetromino.types))]
+      tetromino.orientation = int(rng.integers(4))
+      cells = [(0, -1)]
+      while not reference_fits(board, cells):
+         tetromino.bottom_left_cell = Point(int(rng.integers(-3, grid_w)),
+                                            int(rng.integers(0, grid_h + 3)))
+         cells = reference_cells(tetromino)
+      cells = sorted(cells)
+      for direction in ["left", "right", "down", "up"]:
+         moved = engine.copy()
+         if direction == "up":
+            success = moved.rotate()
+         else:
+            success = moved.move(direction)
+         expected_cells = sorted(reference_cells(tetromino, direction))
+         expected = reference_fits(board, expected_cells)
+         result_cells = sorted((x, y) for x, y, exponent in
+                               moved.current_tetromino.get_cells())
+         if success != expected or \
+               result_cells != (expected_cells if expected else cells):
+            mismatches += 1
+            break
+   return mismatches
+
+# Function that returns the given snapshot bytes with the given bytes written
+# at the given offset
+def corrupt(data, offset, values):
+   return data[:offset] + bytes(values) + data[offset + len(values):]
+
+# Function that checks the snapshots of the given number of random games: a
+# snapshot must restore the game exactly, and snapshots with a piece outside
+# the game grid, a too big tile exponent, a piece generator index past its
+# batch or missing bytes must raise a ValueError and leave the game engine
+# unchanged, the number of the games with a mismatch is returned
+def check_snapshots(games, rng):
+   piece_offset = snapshot.header_format.size + snapshot.game_format.size
+   mismatches = 0
+   for i in range(games):
+      grid_h, grid_w = int(rng.integers(4, 25)), int(rng.integers(4, 17))
+      engine = GameEngine(grid_h, grid_w, int(rng.integers(2 ** 32)))
+      engine.spawn()
+      for j in range(rng.integers(0, 20)):
+         engine.drop()
+         engine.step()
+      data = snapshot.dumps(engine)
+      board_offset = piece_offset + 2 * snapshot.piece_format.size
+      generator_offset = board_offset + grid_h * grid_w
+      # the x of the current tetromino, a tile exponent of the board and the
+      # index of the next type in its batch
+      corrupted = [
+         corrupt(data, piece_offset + 3, int(rng.integers(grid_w, 500)
+                                               ).to_bytes(2, "little")),
+         corrupt(data, board_offset + int(rng.integers(grid_h * grid_w)),
+                 [int(rng.integers(snapshot.max_exponent + 1, 256))]),
+         corrupt(data, generator_offset + 2, (2000).to_bytes(2, "little")),
+         data[:int(rng.integers(len(data)))]]
+      restored = GameEngine(grid_h, grid_w)
+      if snapshot.dumps(snapshot.loads(data, restored)) != data:
+         mismatches += 1
+         continue
+      for bad_data in corrupted:
+         try:
+            snapshot.loads(bad_data, restored)
+         except ValueError:
+            if snapshot.dumps(restored) == data:
+               continue
+         mismatches += 1
+         break
+   return mismatches
+
+# Function that plays a game with random keys and compares each frame shown by
+# GameGrid.display (which repaints only the changed cells) with the full frame
+# of the same game grid for the given number of frames, the number of the
+# mismatches is returned
+def check_frames(frames, rng):
+   grid_h, grid_w = frame_grid_size
+   setup_canvas(grid_h, grid_w, offscreen=True)
+   grid = None
+   pause = False
+   mismatches = 0
+   for i in range(frames):
+      # a new game starts when the game is over
+      if grid is None or grid.game_over:
+         grid = GameGrid(grid_h, grid_w, int(rng.integers(2 ** 32)))
+         grid.spawn()
+      # the game is paused or resumed now and then (a full frame is drawn),
+      # the tetromino moves only while the game is not paused
+      if rng.random() < 0.02:
+         pause = not pause
+      if not pause:
+         key = rng.choice(["left", "right", "up", "space", "down", "none"])
+         if key == "up":
+            grid.rotate()
+         elif key == "space":
+            grid.drop()
+         elif key != "none":
+            grid.move(key)
+         if rng.random() < 0.5:
+            grid.step()
+      grid.display(pause)
+      shown = stddraw.getFrame()
+      grid.draw_frame(pause)
+      stddraw.show(0)
+      if not (shown == stddraw.getFrame()).all():
+         mismatches += 1
+   return mismatches
+
+# Main function where the checks start execution
+def main():
+   parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+   parser.add_argument("--boards", type=int, default=1000,
+                       help="the number of the boards (or frames) of each check")
+   parser.add_argument("--seed", type=int, default=0,
+                       help="the seed of the random boards")
+   args = parser.parse_args()
+   checks = [("merge", check_merge), ("collisions", check_collisions),
+             ("snapshots", check_snapshots), ("frames", check_frames)]
+   failed = False
+   for name, check in checks:
+      rng = np.random.default_rng(args.seed)
+      mismatches = check(args.boards, rng)
+      print("%-10s %d checked, %d mismatches" % (name, args.boards, mismatches))
+      failed = failed or mismatches > 0
+   sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+   main()
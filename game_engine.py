@@ -0,0 +1,316 @@
+from tetromino import Tetromino  # the class for modeling the tetrominoes
+from piece_generator import PieceGenerator  # the random values of the game
+import numpy as np  # fundamental Python module for scientific computing
+
+# Function that converts the given tile exponents to the tile numbers (the
+# number of a tile is 2 ** exponent and the empty cells with exponent 0 are 0)
+def to_numbers(exponents):
+   exponents = np.asarray(exponents, dtype=np.int64)
+   return np.where(exponents > 0, np.left_shift(1, exponents), 0)
+
+# Function that clears the full rows of all the given boards (an array of shape
+# (B, grid_h, grid_w) of the tile exponents, a game engine is a batch of one
+# board) at once, returns the boards, the score gained on each board and the
+# number of the cleared rows of each board
+def check_grids(boards):
+   full = boards.all(axis=2)
+   n_full = full.sum(axis=1)
+   if not n_full.any():
+      return boards, np.zeros(len(boards), dtype=np.int64), n_full
+   # all the tiles of a full row are occupied, so their numbers are simply
+   # 2 ** exponent
+   row_sums = np.left_shift(1, boards.astype(np.int64)).sum(axis=2)
+   gains = np.where(full, row_sums, 0).sum(axis=1)
+   # the remaining rows of each board are moved to its bottom (in the same
+   # order) and the full rows are moved to its top, where they are emptied
+   order = np.argsort(full, axis=1, kind="stable")
+   boards = boards[np.arange(len(boards))[:, None], order]
+   grid_h = boards.shape[1]
+   boards[np.arange(grid_h) >= (grid_h - n_full)[:, None]] = 0
+   return boards, gains, n_full
+
+# Function that merges the equal tiles on top of each other on all the given
+# boards at once (see check_grids), returns the boards, the score gained
+# on each board and the number of the merges on each board
+def merge_boards(boards):
+   gains = np.zeros(len(boards), dtype=np.int64)
+   n_merges = np.zeros(len(boards), dtype=np.int64)
+   rows = np.arange(boards.shape[1])[:, None]
+   while True:
+      # pairs of vertically adjacent tiles with the same number
+      lower, upper = boards[:, :-1], boards[:, 1:]
+      equal = (lower != 0) & (lower == upper)
+      merged = equal.any(axis=1)
+      if not merged.any():
+         return boards, gains, n_merges
+      # row index of the lowest pair of equal tiles in each column of each
+      # board, only the columns with a pair are merged
+      merge_rows = equal.argmax(axis=1)
+      b, cols = np.nonzero(merged)
+      merge_row = merge_rows[b, cols]
+      boards[b, merge_row, cols] += 1
+      gains += np.bincount(b, to_numbers(boards[b, merge_row, cols]),
+                           len(boards)).astype(np.int64)
+      # delete the upper tile of each pair by moving the tiles above it down
+      shifted = np.zeros_like(boards)
+      shifted[:, :-1] = boards[:, 1:]
+      to_shift = merged[:, None, :] & (rows > merge_rows[:, None, :])
+      boards = np.where(to_shift, shifted, boards)
+      n_merges += merged.sum(axis=1)
+
+# Function that deletes the isolated tiles of all the given boards at once
+# (see check_grids), returns the boards, the score gained on each board
+# and the number of the deleted tiles of each board
+def delete_tiles(boards):
+   occupied = boards != 0
+   # a tile is isolated when its 4 neighbours are all empty
+   neighbours = occupied[:, 2:, 1:-1] | occupied[:, :-2, 1:-1] | \
+                occupied[:, 1:-1, 2:] | occupied[:, 1:-1, :-2]
+   isolated = np.zeros_like(occupied)
+   isolated[:, 1:-1, 1:-1] = occupied[:, 1:-1, 1:-1] & ~neighbours
+   n_isolated = isolated.sum(axis=(1, 2))
+   if not n_isolated.any():
+      return boards, np.zeros(len(boards), dtype=np.int64), n_isolated
+   gains = np.where(isolated, to_numbers(boards), 0).sum(axis=(1, 2))
+   boards[isolated] = 0
+   return boards, gains, n_isolated
+
+# Class used for modelling the rules of the game without any rendering, so
+# that games can be simulated headless (e.g. for balancing and bots)
+class GameEngine:
+   # the number of wall columns on each side of the game grid in the occupancy
+   # bitmasks (see get_occupancy), a tetromino can be at most 3 columns out of
+   # the game grid (the empty columns of its tile matrix)
+   wall_width = 4
+
+   # Constructor for creating the game engine based on the given arguments,
+   # the random values of the game are taken from the given generator or from
+   # a new generator with the given seed (None = random)
+   def __init__(self, grid_h, grid_w, seed=None, generator=None):
+      # set the dimensions of the game grid as the given arguments
+      self.grid_height = grid_h
+      self.grid_width = grid_w
+      # create a tile matrix to store the tiles landed onto the game grid as
+      # the log2 exponents of their numbers (0 is used for the empty cells)
+      self.tile_matrix = np.zeros((grid_h, grid_w), dtype=np.uint8)
+      # the occupancy bitmasks of the walls on the left and on the right of
+      # the game grid, and of the rows of the game grid (None = not computed
+      # since the tile matrix changed)
+      wall = (1 << GameEngine.wall_width) - 1
+      self.walls = wall | (wall << (grid_w + GameEngine.wall_width))
+      self.occupancy = None
+      # the tetromino that is currently being moved on the game grid and the
+      # tetromino that will enter the game grid after it
+      self.current_tetromino = None
+      self.next_tetromino = None
+      # the game_over flag shows whether the game is over or not
+      self.game_over = False
+      self.speed = 300
+      # sum score
+      self.score = 0
+      # the numbers of the cleared rows and of the merges so far
+      self.lines_cleared = 0
+      self.merges = 0
+      # the random generator used for the types, positions and numbers
+      if generator is None:
+         generator = PieceGenerator(seed)
+      self.generator = generator
+      # the names of the fields of the game engine (the fields above) that are
+      # copied by the copy method, the fields added by subclasses (e.g. for
+      # rendering the game grid) are left out of the copies
+      self.engine_fields = tuple(self.__dict__) + ("engine_fields",)
+
+   # Method that returns a headless copy of the game engine (a GameEngine even
+   # if this is a GameGrid) that can be changed without changing this one,
+   # e.g. for trying moves out, the random generator is shared with the copy
+   def copy(self):
+      engine = GameEngine.__new__(GameEngine)
+      engine.__dict__.update((name, self.__dict__[name])
+                             for name in self.engine_fields)
+      # only the fields that are changed in place are copied deeply
+      engine.tile_matrix = self.tile_matrix.copy()
+      if self.current_tetromino is not None:
+         engine.current_tetromino = self.current_tetromino.copy()
+      if self.next_tetromino is not None:
+         engine.next_tetromino = self.next_tetromino.copy()
+      return engine
+
+   # Method for creating a random shaped tetromino to enter the game grid
+   def create_tetromino(self):
+      # type (shape) of the tetromino is determined randomly
+      random_type = self.generator.next_type()
+      # create and return the tetromino
+      return Tetromino(random_type, self.grid_height, self.grid_width,
+                       self.generator)
+
+   # Method that makes the next tetromino the current one and creates a new
+   # next tetromino, the new current tetromino is returned
+   def spawn(self):
+      if self.next_tetromino is None:
+         self.next_tetromino = self.create_tetromino()
+      self.current_tetromino = self.next_tetromino
+      self.next_tetromino = self.create_tetromino()
+      return self.current_tetromino
+
+   # Method for moving the current tetromino in the given direction by 1,
+   # returns True when the tetromino is moved
+   def move(self, direction):
+      if self.current_tetromino is None:
+         return False
+      return self.current_tetromino.move(direction, self)
+
+   # Method for rotating the current tetromino, returns True when the
+   # tetromino is rotated
+   def rotate(self):
+      if self.current_tetromino is None:
+         return False
+      return self.current_tetromino.rotate(self)
+
+   # Method for dropping the current tetromino as far down as possible,
+   # returns the number of rows it is moved down
+   def drop(self):
+      distance = self.drop_distance()
+      if distance > 0:
+         tetromino = self.current_tetromino
+         tetromino.bottom_left_cell = tetromino.bottom_left_cell.translate(
+            0, -distance)
+      return distance
+
+   # Method that returns the number of rows the given tetromino (the current
+   # tetromino by default) can move down before it lands, it is found in one
+   # pass by comparing the bottom profile of the tetromino with the heights of
+   # the columns below it
+   def drop_distance(self, tetromino=None):
+      if tetromino is None:
+         tetromino = self.current_tetromino
+      if tetromino is None:
+         return 0
+      xs, ys = tetromino.get_bottom_profile()
+      # the occupied cells below the bottommost tile of each column
+      rows = np.arange(self.grid_height)[:, None]
+      below = (self.tile_matrix[:, xs] != 0) & (rows < ys)
+      # the height of each column below the tetromino (the row above its
+      # topmost occupied cell, or 0 when it is empty)
+      heights = np.where(below.any(axis=0),
+                         self.grid_height - below[::-1].argmax(axis=0), 0)
+      return int((ys - heights).min())
+
+   # Method that advances the game by one gravity tick: the current tetromino
+   # is moved down by one, or it is locked when it cannot go down anymore and
+   # the next tetromino enters the game grid. Returns True if the current
+   # tetromino is moved down and False if it is locked.
+   def step(self):
+      if self.move("down"):
+         return True
+      self.update_grid(self.current_tetromino)
+      self.spawn()
+      return False
+
+   # Method used for checking whether the grid cell with given row and column
+   # indexes is occupied by a tile or empty
+   def is_occupied(self, row, col):
+      # considering newly entered tetrominoes to the game grid that may have
+      # tiles with position.y >= grid_height
+      if not self.is_inside(row, col):
+         return False
+      # the cell is occupied by a tile if its exponent is not 0
+      return self.tile_matrix[row][col] != 0
+
+   # Method used for checking whether the cell with given row and column indexes
+   # is inside the game grid or not
+   def is_inside(self, row, col):
+      if row < 0 or row >= self.grid_height:
+         return False
+      if col < 0 or col >= self.grid_width:
+         return False
+      return True
+
+   # Method that returns the occupancy of the game grid as a list of bitmasks,
+   # one for each row: bit wall_width + col is set if the cell in the column col
+   # is occupied, and the bits of the walls are set
+   def get_occupancy(self):
+      if self.occupancy is None:
+         bits = np.left_shift(1, np.arange(self.grid_width, dtype=np.int64) +
+                              GameEngine.wall_width)
+         rows = (self.tile_matrix != 0) @ bits
+         self.occupancy = [int(row) | self.walls for row in rows]
+      return self.occupancy
+
+   # Method that locks the tiles of the given tetromino (the current tetromino
+   # by default) on the game grid while checking if the game is over due to
+   # having tiles above the topmost grid row
+   def lock(self, tetromino=None):
+      if tetromino is None:
+         tetromino = self.current_tetromino
+      # the locked tetromino is not moved on the game grid anymore
+      self.current_tetromino = None
+      for x, y, exponent in tetromino.get_cells():
+         if self.is_inside(y, x):
+            self.tile_matrix[y][x] = exponent
+         # the game is over if any placed tile is out of the game grid
+         else:
+            self.game_over = True
+      self.occupancy = None
+      return self.game_over
+
+   # Method that applies the rules of the game after a tetromino is locked:
+   # full rows are cleared, equal tiles are merged and isolated tiles removed
+   def resolve(self):
+      self.lines_cleared += self.check_grid()
+      self.merges += self.merge()
+      self.delete_tile()
+
+   # Method that locks the tiles of the landed tetromino on the game grid and
+   # resolves the game grid. The method returns True when the game is over and
+   # False otherwise.
+   def update_grid(self, tetromino):
+      self.lock(tetromino)
+      self.resolve()
+      # return the game_over flag
+      return self.game_over
+
+   # Method that returns the numbers of the tiles on the game grid
+   def get_numbers(self):
+      return to_numbers(self.tile_matrix)
+
+   # Method that clears all the full rows of the game grid at once, adds the
+   # numbers of their tiles to the score and moves the remaining rows down.
+   # Returns the number of the cleared rows.
+   def check_grid(self):
+      boards, gains, n_full = check_grids(self.tile_matrix[None])
+      if n_full[0] == 0:
+         return 0
+      self.tile_matrix = boards[0]
+      self.score += int(gains[0])
+      self.occupancy = None
+      return int(n_full[0])
+
+   # Method for if there are no tiles around all 4 of the tile,
+   # it deletes the tile and adds the tile's score to the total score.
+   # Only the tiles that are not on the edges of the game grid are checked.
+   # All the isolated tiles are deleted at once (deleting an isolated tile
+   # cannot isolate another tile) and the number of them is returned.
+   def delete_tile(self):
+      boards, gains, n_deleted = delete_tiles(self.tile_matrix[None])
+      if n_deleted[0] == 0:
+         return 0
+      self.tile_matrix = boards[0]
+      self.score += int(gains[0])
+      self.occupancy = None
+      return int(n_deleted[0])
+
+   # Method for If the numbers in the overlapping tiles
+   # are the same, add the numbers and delete the upper
+   # tile and write the total number in the lower tile.
+   # The lowest pair of equal tiles of every column is merged at the same
+   # time and the tiles above each merged pair move down by one, this is
+   # repeated until no column has equal tiles on top of each other.
+   # Returns the number of the merges.
+   def merge(self):
+      boards, gains, n_merges = merge_boards(self.tile_matrix[None])
+      if n_merges[0] == 0:
+         return 0
+      self.tile_matrix = boards[0]
+      self.score += int(gains[0])
+      self.occupancy = None
+      return int(n_merges[0])
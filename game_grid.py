@@ -1,48 +1,175 @@
 import lib.stddraw as stddraw  # stddraw is used as a basic graphics library
 from lib.color import Color # used for coloring the game grid
 from point import Point  # used for tile positions
+from tile import Tile  # used for drawing the tiles on the game grid
+from game_engine import GameEngine  # the rules of the game
 import numpy as np  # fundamental Python module for scientific computing
 
-# Class used for modelling the game grid
-class GameGrid:
+# Function that sets the canvas of stddraw up for a game grid with the given
+# size (the grid and the side panel on its right), the canvas is rendered
+# offscreen without a window if offscreen is True
+def setup_canvas(grid_h, grid_w, offscreen=False):
+   # set the size of the drawing canvas
+   stddraw.setCanvasSize(60 * grid_w, 40 * grid_h, offscreen=offscreen)
+   # set the scale of the coordinate system
+   stddraw.setXscale(-0.5, grid_w + 4.5)
+   stddraw.setYscale(-0.5, grid_h - 0.5)
+
+# Class used for modelling the game grid, it draws the state of the game
+# engine it extends by using stddraw
+class GameGrid(GameEngine):
+   # value used for the ghost tiles in the visible cells (see
+   # get_visible_cells), the tile exponents are less than 256
+   ghost_cell = -256
+
    # Constructor for creating the game grid based on the given arguments
-   def __init__(self, grid_h, grid_w):
-      # set the dimensions of the game grid as the given arguments
-      self.grid_height = grid_h
-      self.grid_width = grid_w
-      # create a tile matrix to store the tiles landed onto the game grid
-      self.tile_matrix = np.full((grid_h, grid_w), None)
-      # create the tetromino that is currently being moved on the game gri
-      self.current_tetromino = None
-      self.next_tetromino = None
-      # the game_over flag shows whether the game is over or not
-      self.game_over = False
-      self.speed = 300
+   def __init__(self, grid_h, grid_w, seed=None, generator=None):
+      # create the game engine with the given dimensions
+      super().__init__(grid_h, grid_w, seed, generator)
       # set the color used for the empty grid cells
       self.empty_cell_color = Color(205, 193, 180)
       # set the colors used for the grid lines and the grid boundaries
       self.line_color = Color(187, 173, 160)
       self.boundary_color = Color(147, 133, 120)
+      # set the color used for the ghost tiles that show where the current
+      # tetromino lands
+      self.ghost_color = Color(190, 177, 164)
       # thickness values used for the grid lines and the grid boundaries
       self.line_thickness = 0.006
       self.box_thickness = 1.5 * self.line_thickness
-      # sum score
-      self.score = 0
+      # what is drawn on the canvas by the last call of the display method
+      # (None = nothing, the whole canvas is repainted)
+      self.drawn_cells = None
+      self.drawn_pause = False
+      self.drawn_score = None
+      self.drawn_next_tetromino = None
+      self.drawn_hud = None
+      # the lines of text shown by the performance overlay on the right side
+      # (None = the overlay is hidden)
+      self.hud = None
+      # pictures of the static layers of the canvas and the canvas scale they
+      # are drawn for (see get_layers)
+      self.background = None
+      self.grid_lines = None
+      self.ghost = None
+      self.layer_scale = None
 
-   # Method used for displaying the game grid
+   # Method used for displaying the game grid, only the grid cells and the
+   # side panel that changed since the last frame are repainted and shown
    def display(self, pause):
-      # clear the background canvas to empty_cell_color
-      stddraw.clear(self.empty_cell_color)
+      cells = self.get_visible_cells()
+      # the whole canvas is repainted for the first frame, after the canvas is
+      # drawn over (see invalidate), when the game is paused or resumed and
+      # when the performance overlay is shown or hidden
+      if self.drawn_cells is None or pause != self.drawn_pause or \
+            (self.hud is None) != (self.drawn_hud is None):
+         self.draw_frame(pause)
+         if self.hud is not None:
+            self.draw_hud()
+         regions = None
+      else:
+         regions = []
+         # repaint the grid cells whose content changed since the last frame
+         for row, col in np.argwhere(cells != self.drawn_cells):
+            regions.append(self.draw_cell(row, col, cells))
+         # repaint the side panel if the score or the next tetromino changed
+         if self.score != self.drawn_score or \
+               self.next_tetromino is not self.drawn_next_tetromino:
+            regions.append(self.draw_side_panel())
+         # the performance overlay is repainted on every frame
+         if self.hud is not None:
+            regions.append(self.draw_hud())
+      # remember what is on the canvas now
+      self.drawn_cells = cells
+      self.drawn_pause = pause
+      self.drawn_score = self.score
+      self.drawn_next_tetromino = self.next_tetromino
+      self.drawn_hud = self.hud
+      # show the resulting drawing (the game loop schedules the frames)
+      if regions is None:
+         stddraw.show(0)
+      else:
+         stddraw.showRegions(regions)
+
+   # Method that makes the next call of display repaint the whole canvas (used
+   # when something else, e.g. a menu, is drawn over the game grid)
+   def invalidate(self):
+      self.drawn_cells = None
+
+   # Method that returns what is drawn on each grid cell: the exponent of the
+   # locked tile (> 0), the negated exponent of a tile of the current
+   # tetromino (< 0), GameGrid.ghost_cell for a ghost tile or 0 for an empty
+   # cell
+   def get_visible_cells(self):
+      cells = self.tile_matrix.astype(np.int16)
+      if self.current_tetromino is not None:
+         # the ghost tiles are below the current tetromino where it lands
+         distance = self.drop_distance()
+         for x, y, exponent in self.current_tetromino.get_cells():
+            if self.is_inside(y - distance, x):
+               cells[y - distance][x] = GameGrid.ghost_cell
+         for x, y, exponent in self.current_tetromino.get_cells():
+            if self.is_inside(y, x):
+               cells[y][x] = -exponent
+      return cells
+
+   # Method for drawing the whole canvas
+   def draw_frame(self, pause):
+      # draw the static background (the empty cells and the side panel labels)
+      stddraw.picture(self.get_background())
+      # draw the score and the next tetromino to the right side
+      self.draw_panel()
+
+      # draw the game grid
+      self.draw_grid()
 
+      # draw the current/active tetromino if it is not None (the case when the
+      # game grid is updated)
+      if self.current_tetromino is not None:
+         self.draw_tetromino(self.current_tetromino)
+      # draw a box around the game grid
+      self.draw_boundaries()
+
+      # draw the pause screen
+      if (pause):
+         stddraw.setPenColor(stddraw.DARK_GRAY)
+         stddraw.setFontSize(35)
+         stddraw.setFontFamily("Helvetica Neue")
+         stddraw.text(self.grid_width / 2, self.grid_height / 2, "Game is Paused")
+         stddraw.text(self.grid_width / 2, self.grid_height / 2-1, "Press P for Resume")
+
+   # Method that returns the pictures of the static layers of the canvas, the
+   # background (the empty cells and the labels on the right side) and the
+   # inner lines of the grid, they are drawn once for each canvas scale
+   # together with the picture of a ghost tile
+   def get_layers(self):
+      scale = stddraw.getScale()
+      if scale != self.layer_scale:
+         stddraw.beginPicture()
+         stddraw.clear(self.empty_cell_color)
+         self.draw_labels()
+         self.background = stddraw.endPicture()
+         stddraw.beginPicture()
+         self.draw_grid_lines()
+         self.grid_lines = stddraw.endPicture()
+         stddraw.beginPicture(0, 0, 1, 1)
+         stddraw.setPenColor(self.ghost_color)
+         stddraw.filledSquare(0, 0, 0.5)
+         self.ghost = stddraw.endPicture()
+         self.layer_scale = scale
+      return self.background, self.grid_lines
+
+   # Method that returns the picture of the static background of the canvas
+   def get_background(self):
+      return self.get_layers()[0]
+
+   # Method for drawing the labels that do not change on the right side
+   def draw_labels(self):
       # draw the Your Score to the right side
       stddraw.setFontSize(38)
       stddraw.setPenColor(stddraw.WHITE)
       stddraw.text(self.grid_width + 2, self.grid_height - 2.5, "Your Score")
 
-      # draw the score to the right side
-      stddraw.setFontSize(50)
-      stddraw.text(self.grid_width + 2, self.grid_height - 3.5, str(self.score))
-
       # draw to the How to Play? to the right side
       stddraw.setPenColor(Color(255, 255, 255))
       stddraw.rectangle(self.grid_width + 1, self.grid_height - 1.75, 2, 1)
@@ -55,38 +182,91 @@ class GameGrid:
       stddraw.setPenColor(stddraw.WHITE)
       stddraw.text(self.grid_width + 2, self.grid_height - 13, "Next Tetromino")
 
-      # draw the game grid
-      self.next_tetromino.draw_next_tetro()
-      self.draw_grid()
+   # Method for drawing the score and the next tetromino on the right side
+   def draw_panel(self):
+      # draw the score to the right side
+      stddraw.setFontSize(50)
+      stddraw.setPenColor(stddraw.WHITE)
+      stddraw.text(self.grid_width + 2, self.grid_height - 3.5, str(self.score))
+      self.draw_next_tetromino()
 
-      # draw the current/active tetromino if it is not None (the case when the
-      # game grid is updated)
-      if self.current_tetromino is not None:
-         self.current_tetromino.draw()
-      # draw a box around the game grid
+   # Method for repainting the side panel, the repainted region is returned
+   def draw_side_panel(self):
+      region = (self.grid_width - 0.4, -0.5, 5, self.grid_height)
+      stddraw.setClip(*region)
+      stddraw.picture(self.get_background())
+      self.draw_panel()
       self.draw_boundaries()
+      stddraw.setClip()
+      return region
 
-      # draw the pause screen
-      if (pause):
-         stddraw.setPenColor(stddraw.DARK_GRAY)
-         stddraw.setFontSize(35)
-         stddraw.setFontFamily("Helvetica Neue")
-         stddraw.text(self.grid_width / 2, self.grid_height / 2, "Game is Paused")
-         stddraw.text(self.grid_width / 2, self.grid_height / 2-1, "Press P for Resume")
+   # Method for drawing the performance overlay (the lines of text in hud)
+   # between the score and the next tetromino, the repainted region is
+   # returned
+   def draw_hud(self):
+      region = (self.grid_width + 0.1, self.grid_height - 11.5, 3.8, 7)
+      stddraw.setClip(*region)
+      stddraw.picture(self.get_background())
+      stddraw.setFontSize(14)
+      stddraw.setPenColor(stddraw.WHITE)
+      for i in range(len(self.hud)):
+         stddraw.text(self.grid_width + 2, self.grid_height - 4.8 - 0.48 * i,
+                      self.hud[i])
+      stddraw.setClip()
+      return region
 
-      # show the resulting drawing with a pause duration
-      stddraw.show(self.speed)
+   # Method for repainting the grid cell with given row and column indexes by
+   # using the given visible cells (see get_visible_cells). Everything that
+   # overlaps the cell is drawn again in the same order as in draw_frame,
+   # restricted to the cell and a small margin around it for the grid lines
+   # and the tile borders on its edges. The repainted region is returned.
+   def draw_cell(self, row, col, cells):
+      margin = 0.1
+      region = (col - 0.5 - margin, row - 0.5 - margin, 1 + 2 * margin,
+                1 + 2 * margin)
+      background, grid_lines = self.get_layers()
+      stddraw.setClip(*region)
+      stddraw.picture(background)
+      # the locked tiles on the cell and around it
+      neighbours = [(r, c) for r in range(row - 1, row + 2)
+                    for c in range(col - 1, col + 2) if self.is_inside(r, c)]
+      for r, c in neighbours:
+         if cells[r][c] > 0:
+            Tile(Point(c, r), 2 ** int(cells[r][c])).draw()
+         elif cells[r][c] == GameGrid.ghost_cell:
+            stddraw.picture(self.ghost, c, r)
+      # the inner grid lines
+      stddraw.picture(grid_lines)
+      # the tiles of the current tetromino on the cell and around it
+      for r, c in neighbours:
+         if GameGrid.ghost_cell < cells[r][c] < 0:
+            Tile(Point(c, r), 2 ** int(-cells[r][c])).draw()
+      self.draw_boundaries()
+      stddraw.setClip()
+      return region
 
-   # Method for drawing the cells and the lines of the grid
+   # Method for drawing the locked tiles, the ghost of the current tetromino
+   # and the lines of the grid
    def draw_grid(self):
-      self.delete_tile()
-      # for each cell of the game grid
-      for row in range(self.grid_height):
-         for col in range(self.grid_width):
-            # draw the tile if the grid cell is occupied by a tile
-            if self.tile_matrix[row][col] is not None:
-               self.tile_matrix[row][col].draw()
-      # draw the inner lines of the grid
+      # draw the tile of each grid cell that is occupied by a tile
+      for row, col in zip(*np.nonzero(self.tile_matrix)):
+         self.get_tile(row, col).draw()
+      grid_lines = self.get_layers()[1]
+      if self.current_tetromino is not None:
+         self.draw_ghost(self.current_tetromino)
+      # draw the inner lines of the grid over the tiles
+      stddraw.picture(grid_lines)
+
+   # Method for drawing the ghost of the given tetromino, the tiles that show
+   # where it lands when it is dropped
+   def draw_ghost(self, tetromino):
+      distance = self.drop_distance(tetromino)
+      for x, y, exponent in tetromino.get_cells():
+         if self.is_inside(y - distance, x):
+            stddraw.picture(self.ghost, x, y - distance)
+
+   # Method for drawing the inner lines of the grid
+   def draw_grid_lines(self):
       stddraw.setPenColor(self.line_color)
       stddraw.setPenRadius(self.line_thickness)
       # x and y ranges for the game grid
@@ -98,6 +278,14 @@ class GameGrid:
          stddraw.line(start_x, y, end_x, y)
       stddraw.setPenRadius()  # reset the pen radius to its default value
 
+   # Method that returns a Tile view of the grid cell with given row and column
+   # indexes for rendering (None for an empty cell)
+   def get_tile(self, row, col):
+      exponent = int(self.tile_matrix[row][col])
+      if exponent == 0:
+         return None
+      return Tile(Point(int(col), int(row)), 2 ** exponent)
+
    # Method for drawing the boundaries around the game grid
    def draw_boundaries(self):
       # draw a bounding box around the game grid as a rectangle
@@ -110,109 +298,19 @@ class GameGrid:
       stddraw.rectangle(pos_x, pos_y, self.grid_width, self.grid_height)
       stddraw.setPenRadius()  # reset the pen radius to its default value
 
-   # Method used for checking whether the grid cell with given row and column
-   # indexes is occupied by a tile or empty
-   def is_occupied(self, row, col):
-      # considering newly entered tetrominoes to the game grid that may have
-      # tiles with position.y >= grid_height
-      if not self.is_inside(row, col):
-         return False
-      # the cell is occupied by a tile if it is not None
-      return self.tile_matrix[row][col] != None
-
-   # Method used for checking whether the cell with given row and column indexes
-   # is inside the game grid or not
-   def is_inside(self, row, col):
-      if row < 0 or row >= self.grid_height:
-         return False
-      if col < 0 or col >= self.grid_width:
-         return False
-      return True
-
-   # Method that locks the tiles of the landed tetromino on the game grid while
-   # checking if the game is over due to having tiles above the topmost grid row.
-   # The method returns True when the game is over and False otherwise.
-   def update_grid(self, tiles_to_place):
-      # necessary for the display method to stop displaying the tetromino
-      self.current_tetromino = None
-      # lock the tiles of the current tetromino (tiles_to_lock) on the game grid
-      n_rows, n_cols = len(tiles_to_place), len(tiles_to_place[0])
-      for col in range(n_cols):
-         for row in range(n_rows):
-            # place each occupied tile onto the game grid
-            if tiles_to_place[row][col] is not None:
-               # compute the position of the tile on the game grid
-               pos = tiles_to_place[row][col].get_position()
-               if self.is_inside(pos.y, pos.x):
-                  self.tile_matrix[pos.y][pos.x] = tiles_to_place[row][col]
-               # the game is over if any placed tile is out of the game grid
-               else:
-                  self.game_over = True
-      # call the check_grid and merge method
-      self.check_grid()
-      self.merge()
-      # return the game_over flag
-      return self.game_over
-
-   def check_grid(self):
-      for row in range(self.grid_width):
-         if None not in self.tile_matrix[row]:
-            self.delete_row(row)
-            self.move_row(row)
-            self.check_grid()
-
-   # Method for delete the row when row are full
-   def delete_row(self, row):
-      for i in range(self.grid_width):
-         new_score = self.tile_matrix[row][i].number
-         self.score += new_score
-
-      self.tile_matrix = np.delete(self.tile_matrix, row, axis=0)
-      self.tile_matrix = np.append(self.tile_matrix, np.reshape(np.full(self.grid_width, [None]), (-1, self.grid_width)), axis=0)
-
-   # Method for when one row deleted, tiles will move to the down row
-   def move_row(self, row):
-      for row_i in range(row, self.grid_height):
-         for col_i in range(self.grid_width):
-            if self.tile_matrix[row_i][col_i] is not None:
-               self.tile_matrix[row_i][col_i].move_tetro(0, -1)
-
-   # Method for when one row deleted, tiles on column will move to the down row
-   def move_column(self, col, row):
-      for row_i in range(row, self.grid_height):
-         if self.tile_matrix[row_i][col] is not None:
-            self.tile_matrix[row_i][col].move_tetro(0, -1)
-      # transpose the tile to the down
-      transposed = self.tile_matrix.transpose()
-      deleted = np.delete(transposed[col], row)
-      transposed[col] = np.append(deleted, [None], axis=0)
-      self.tile_matrix = transposed.transpose()
-
-   # Method for if there are no tiles around all 4 of the tile,
-   # it deletes the tile and adds the tile's score to the total score.
-   def delete_tile(self):
-      for row_i in range(1, self.grid_height - 1):
-         for col_i in range(1, self.grid_width - 1):
-            if self.tile_matrix[row_i][col_i] is not None:
-               if self.tile_matrix[row_i + 1][col_i] is None and \
-                       self.tile_matrix[row_i - 1][col_i] is None and \
-                       self.tile_matrix[row_i][col_i + 1] is None and \
-                       self.tile_matrix[row_i][col_i - 1] is None:
-                  new_score = self.tile_matrix[row_i][col_i].number
-                  self.score += new_score
-                  self.tile_matrix[row_i][col_i] = None
-                  self.delete_tile()
-
-   # Method for If the numbers in the overlapping tiles
-   # are the same, add the numbers and delete the upper
-   # tile and write the total number in the lower tile.
-   def merge(self):
-      for row_i in range(self.grid_height - 1):
-         for col_i in range(self.grid_width):
-            if self.tile_matrix[row_i][col_i] is not None and self.tile_matrix[row_i + 1][col_i] is not None:
-               if self.tile_matrix[row_i][col_i].number == self.tile_matrix[row_i + 1][col_i].number:
-                  self.score += self.tile_matrix[row_i][col_i].number * 2
-                  self.tile_matrix[row_i][col_i].double()
-                  self.tile_matrix[row_i + 1][col_i] = None
-                  self.move_column(col_i, row_i + 1)
-                  self.merge()
\ No newline at end of file
+   # Method for drawing the given tetromino on the game grid
+   def draw_tetromino(self, tetromino):
+      for x, y, exponent in tetromino.get_cells():
+         # draw only the tiles that are inside the game grid
+         if y < self.grid_height:
+            Tile(Point(x, y), 2 ** exponent).draw()
+
+   # Method for drawing the next tetromino on the right side of the game grid
+   def draw_next_tetromino(self):
+      blc = self.next_tetromino.bottom_left_cell
+      n = self.next_tetromino.get_orientation().size
+      for x, y, exponent in self.next_tetromino.get_cells():
+         # position of the tile relative to the top left cell of the tetromino
+         col, row = x - blc.x, (n - 1) - (y - blc.y)
+         Tile(Point(self.grid_width + col + 1, self.grid_height - row - 14),
+              2 ** exponent).draw()
@@ -10,12 +10,16 @@ commonly used Color objects defined in the color module.
 import time
 import os
 import sys
+import math
+import collections
 
 os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = 'hide'
 import pygame
 import pygame.gfxdraw
 import pygame.font
 
+from lib.picture import Picture
+
 import tkinter as Tkinter
 import tkinter.messagebox as tkMessageBox
 import tkinter.filedialog as tkFileDialog
@@ -70,15 +74,42 @@ _ymax = None
 _fontFamily = _DEFAULT_FONT_FAMILY
 _fontSize = _DEFAULT_FONT_SIZE
 
+# Fonts keyed by (family, size, bold) and the most recently rendered
+# text surfaces keyed by (string, family, size, bold, r, g, b)
+_fonts = {}
+_textSurfaces = collections.OrderedDict()
+_MAX_TEXT_SURFACES = 256
+
 _canvasWidth = float(_DEFAULT_CANVAS_SIZE)
 _canvasHeight = float(_DEFAULT_CANVAS_SIZE)
 _penRadius = None
 _penColor = _DEFAULT_PEN_COLOR
-_keysTyped = []
+
+# The queue of the keys the user typed as (key, time) pairs, oldest
+# first. The time is in milliseconds (see _now).
+_keysTyped = collections.deque()
+
+# Key repeat settings (see setKeyRepeat) and the time of the next
+# repeat of each held key
+_keyRepeatDelay = None
+_keyRepeatInterval = None
+_keyRepeatKeys = None
+_keysHeld = {}
+
+# The profiler that is notified when the input is polled, the canvas is
+# presented and the program sleeps (see setProfiler)
+_profiler = None
 
 # Has the window been created?
 _windowCreated = False
 
+# Is the canvas rendered offscreen (without a window)?
+_offscreen = False
+
+# The background canvas and its coordinate system while drawing on a
+# picture (see beginPicture), None otherwise
+_savedCanvas = None
+
 #-----------------------------------------------------------------------
 # Begin added by Alan J. Broder
 #-----------------------------------------------------------------------
@@ -123,6 +154,19 @@ def _factorX(w):
 def _factorY(h):
     return h * _canvasHeight / abs(_ymax - _ymin)
 
+#-----------------------------------------------------------------------
+
+def _pixelRect(x, y, w, h):
+    """
+    Return the smallest pygame.Rect that covers the rectangle of width w
+    and height h whose lower left point is (x, y).
+    """
+    x0 = int(math.floor(_scaleX(x)))
+    x1 = int(math.ceil(_scaleX(x + w)))
+    y0 = int(math.floor(_scaleY(y + h)))
+    y1 = int(math.ceil(_scaleY(y)))
+    return pygame.Rect(x0, y0, x1 - x0, y1 - y0)
+
 #-----------------------------------------------------------------------
 # Begin added by Alan J. Broder
 #-----------------------------------------------------------------------
@@ -139,17 +183,22 @@ def _userY(y):
     
 #-----------------------------------------------------------------------
 
-def setCanvasSize(w=_DEFAULT_CANVAS_SIZE, h=_DEFAULT_CANVAS_SIZE):
+def setCanvasSize(w=_DEFAULT_CANVAS_SIZE, h=_DEFAULT_CANVAS_SIZE,
+                  offscreen=False):
     """
     Set the size of the canvas to w pixels wide and h pixels high.
     Calling this function is optional. If you call it, you must do
-    so before calling any drawing function.
+    so before calling any drawing function. If offscreen is True, then
+    the canvas is shown on an in-memory surface instead of a window:
+    no window is opened, no events are received and the shown frames
+    can be retrieved by calling getFrame or getFrameBytes.
     """
     global _background
     global _surface
     global _canvasWidth
     global _canvasHeight
     global _windowCreated
+    global _offscreen
 
     if _windowCreated:
         raise Exception('The stddraw window already was created')
@@ -159,8 +208,12 @@ def setCanvasSize(w=_DEFAULT_CANVAS_SIZE, h=_DEFAULT_CANVAS_SIZE):
 
     _canvasWidth = w
     _canvasHeight = h
-    _background = pygame.display.set_mode([w, h])
-    pygame.display.set_caption('stddraw window (r-click to save)')
+    _offscreen = offscreen
+    if offscreen:
+        _background = pygame.Surface((w, h))
+    else:
+        _background = pygame.display.set_mode([w, h])
+        pygame.display.set_caption('stddraw window (r-click to save)')
     _surface = pygame.Surface((w, h))
     _surface.fill(_pygameColor(WHITE))
     _windowCreated = True
@@ -230,6 +283,18 @@ def setFontSize(s=_DEFAULT_FONT_SIZE):
     global _fontSize
     _fontSize = s
 
+def setClip(x=None, y=None, w=None, h=None):
+    """
+    Restrict the subsequent drawing on the background canvas to the
+    rectangle of width w and height h whose lower left point is (x, y).
+    If no rectangle is given, then the drawing is not restricted.
+    """
+    _makeSureWindowCreated()
+    if x is None:
+        _surface.set_clip(None)
+    else:
+        _surface.set_clip(_pixelRect(float(x), float(y), float(w), float(h)))
+
 #-----------------------------------------------------------------------
 
 def _makeSureWindowCreated():
@@ -368,11 +433,18 @@ def rectangle(x, y, w, h):
     else:
         xs = _scaleX(x)
         ys = _scaleY(y)
-        pygame.draw.rect(
-            _surface,
-            _pygameColor(_penColor),
-            pygame.Rect(xs, ys-hs, ws, hs),
-            int(round(_penRadius)))
+        rect = pygame.Rect(xs, ys-hs, ws, hs)
+        width = int(round(_penRadius))
+        if (width == 0) or (2 * width >= min(rect.w, rect.h)):
+            pygame.draw.rect(_surface, _pygameColor(_penColor), rect, width)
+        else:
+            # Draw the border as four filled bands, since pygame draws
+            # the border of a clipped rectangle along the clip edges.
+            color = _pygameColor(_penColor)
+            _surface.fill(color, (rect.x, rect.y, rect.w, width))
+            _surface.fill(color, (rect.x, rect.bottom-width, rect.w, width))
+            _surface.fill(color, (rect.x, rect.y, width, rect.h))
+            _surface.fill(color, (rect.right-width, rect.y, width, rect.h))
 
 def filledRectangle(x, y, w, h):
     """
@@ -459,33 +531,60 @@ def filledPolygon(x, y):
     points.append((xScaled[0], yScaled[0]))
     pygame.draw.polygon(_surface, _pygameColor(_penColor), points, 0)
 
-def text(x, y, s):
+def _font(bold):
     """
-    Draw string s on the background canvas centered at (x, y).
+    Return the pygame font of the current font family and size (bold
+    if bold is True). The fonts are loaded once and then cached.
+    """
+    key = (_fontFamily, _fontSize, bold)
+    font = _fonts.get(key)
+    if font is None:
+        font = pygame.font.SysFont(_fontFamily, _fontSize, bold)
+        _fonts[key] = font
+    return font
+
+def _textSurface(s, bold):
+    """
+    Return the surface of string s rendered with the current font and
+    pen color. The most recently used surfaces are cached.
+    """
+    key = (s, _fontFamily, _fontSize, bold,
+           _penColor.getRed(), _penColor.getGreen(), _penColor.getBlue())
+    surface = _textSurfaces.get(key)
+    if surface is None:
+        surface = _font(bold).render(s, 1, _pygameColor(_penColor))
+        _textSurfaces[key] = surface
+        if len(_textSurfaces) > _MAX_TEXT_SURFACES:
+            _textSurfaces.popitem(last=False)
+    else:
+        _textSurfaces.move_to_end(key)
+    return surface
+
+def _drawText(x, y, s, bold):
+    """
+    Draw string s (as a bold text if bold is True) on the background
+    canvas centered at (x, y).
     """
     _makeSureWindowCreated()
     x = float(x)
     y = float(y)
     xs = _scaleX(x)
     ys = _scaleY(y)
-    font = pygame.font.SysFont(_fontFamily, _fontSize)
-    text = font.render(s, 1, _pygameColor(_penColor))
+    text = _textSurface(s, bold)
     textpos = text.get_rect(center=(xs, ys))
     _surface.blit(text, textpos)
 
+def text(x, y, s):
+    """
+    Draw string s on the background canvas centered at (x, y).
+    """
+    _drawText(x, y, s, False)
+
 def boldText(x, y, s):
     """
     Draw string s as a bold text on the background canvas centered at (x, y).
     """
-    _makeSureWindowCreated()
-    x = float(x)
-    y = float(y)
-    xs = _scaleX(x)
-    ys = _scaleY(y)
-    font = pygame.font.SysFont(_fontFamily, _fontSize, True)
-    text = font.render(s, 1, _pygameColor(_penColor))
-    textpos = text.get_rect(center=(xs, ys))
-    _surface.blit(text, textpos)
+    _drawText(x, y, s, True)
 
 def picture(pic, x=None, y=None):
     """
@@ -509,6 +608,77 @@ def picture(pic, x=None, y=None):
     picSurface = pic._surface # violates encapsulation
     _surface.blit(picSurface, [xs-ws/2.0, ys-hs/2.0, ws, hs])
 
+def beginPicture(x=None, y=None, w=None, h=None):
+    """
+    Redirect the subsequent drawing to a new transparent picture that
+    covers the rectangle of width w and height h centered on (x, y),
+    so that it can be drawn with the same coordinates as the background
+    canvas. If no rectangle is given, the picture covers the whole
+    canvas. Call endPicture() to get the picture and to draw on the
+    background canvas again.
+    """
+    global _surface
+    global _canvasWidth
+    global _canvasHeight
+    global _xmin
+    global _xmax
+    global _ymin
+    global _ymax
+    global _savedCanvas
+    _makeSureWindowCreated()
+    if _savedCanvas is not None:
+        raise Exception('A picture is already being drawn')
+    _savedCanvas = (_surface, _canvasWidth, _canvasHeight,
+                    _xmin, _xmax, _ymin, _ymax)
+    if x is None:
+        _surface = pygame.Surface(_surface.get_size(), pygame.SRCALPHA)
+        _surface.fill((0, 0, 0, 0))
+        return
+    # Size of the picture in pixels, and the size of one pixel in
+    # user coordinates (which is the same as on the background canvas).
+    ws = int(math.ceil(_factorX(float(w))))
+    hs = int(math.ceil(_factorY(float(h))))
+    xUnit = (_xmax - _xmin) / _canvasWidth
+    yUnit = (_ymax - _ymin) / _canvasHeight
+    _xmin = float(x) - ws * xUnit / 2.0
+    _xmax = float(x) + ws * xUnit / 2.0
+    _ymin = float(y) - hs * yUnit / 2.0
+    _ymax = float(y) + hs * yUnit / 2.0
+    _canvasWidth = ws
+    _canvasHeight = hs
+    _surface = pygame.Surface((ws, hs), pygame.SRCALPHA)
+    _surface.fill((0, 0, 0, 0))
+
+def endPicture():
+    """
+    Stop drawing on the picture started by beginPicture(), and return
+    it as an object of class picture.Picture.
+    """
+    global _surface
+    global _canvasWidth
+    global _canvasHeight
+    global _xmin
+    global _xmax
+    global _ymin
+    global _ymax
+    global _savedCanvas
+    if _savedCanvas is None:
+        raise Exception('No picture is being drawn')
+    pic = Picture(1, 1)
+    pic._surface = _surface # violates encapsulation
+    (_surface, _canvasWidth, _canvasHeight,
+     _xmin, _xmax, _ymin, _ymax) = _savedCanvas
+    _savedCanvas = None
+    return pic
+
+def getScale():
+    """
+    Return the tuple (xmin, xmax, ymin, ymax, w, h) that defines the
+    coordinate system: the x scale, the y scale and the size of the
+    canvas in pixels.
+    """
+    return (_xmin, _xmax, _ymin, _ymax, _canvasWidth, _canvasHeight)
+
 def clear(c=WHITE):
     """
     Clear the background canvas to color c, where c is an
@@ -541,9 +711,28 @@ def _show():
     """
     Copy the background canvas to the window canvas.
     """
+    _enterPhase('present')
     _background.blit(_surface, (0, 0))
-    pygame.display.flip()
+    if not _offscreen:
+        pygame.display.flip()
+    _checkForEvents()
+    _exitPhase()
+
+def _showRegions(regions):
+    """
+    Copy the given regions of the background canvas to the window
+    canvas, and update only these regions of the window.
+    """
+    _enterPhase('present')
+    rects = []
+    for x, y, w, h in regions:
+        rect = _pixelRect(x, y, w, h).clip(_background.get_rect())
+        _background.blit(_surface, rect, rect)
+        rects.append(rect)
+    if not _offscreen:
+        pygame.display.update(rects)
     _checkForEvents()
+    _exitPhase()
 
 def _showAndWaitForever():
     """
@@ -568,19 +757,41 @@ def show(msec=float('inf')):
     _makeSureWindowCreated()
     _show()
     _checkForEvents()
+    _wait(msec)
+
+def showRegions(regions, msec=0.0):
+    """
+    Copy the given regions of the background canvas to the window
+    canvas, and then wait for msec milliseconds. Each region is a
+    tuple (x, y, w, h) that defines the rectangle of width w and
+    height h whose lower left point is (x, y). The rest of the window
+    canvas is not updated.
+    """
+    _makeSureWindowCreated()
+    _showRegions(regions)
+    _wait(msec)
 
+def _wait(msec):
+    """
+    Wait for msec milliseconds while checking for events.
+    """
     # Sleep for the required time, but check for events every
     # QUANTUM seconds.
     QUANTUM = .01
     sec = msec / 1000.0
+    if sec <= 0:
+        return
+    _enterPhase('sleep')
     if sec < QUANTUM:
         time.sleep(sec)
+        _exitPhase()
         return
     secondsWaited = 0.0
     while secondsWaited < sec:
         time.sleep(QUANTUM)
         secondsWaited += QUANTUM
         _checkForEvents()
+    _exitPhase()
 
 #-----------------------------------------------------------------------
 
@@ -629,9 +840,23 @@ def _checkForEvents():
     Check if any new event has occured (such as a key typed or button
     pressed).  If a key has been typed, then put that key in a queue.
     """
-    global _surface
-    global _keysTyped
-    
+    _makeSureWindowCreated()
+    # There are no events without a window.
+    if _offscreen:
+        return
+
+    _enterPhase('input')
+    for event in pygame.event.get():
+        _handleEvent(event)
+    _repeatHeldKeys()
+    _exitPhase()
+
+def _handleEvent(event):
+    """
+    Handle the given event: if a key has been typed, then put that key
+    in a queue, and if the mouse has been left-clicked, then remember
+    its position.
+    """
     #-------------------------------------------------------------------
     # Begin added by Alan J. Broder
     #-------------------------------------------------------------------
@@ -640,30 +865,123 @@ def _checkForEvents():
     #-------------------------------------------------------------------
     # End added by Alan J. Broder
     #-------------------------------------------------------------------
-    
+
+    if event.type == pygame.QUIT:
+        sys.exit()
+    elif event.type == pygame.KEYDOWN:
+        key = pygame.key.name(event.key)
+        t = _now()
+        _keysTyped.append((key, t))
+        if _isRepeated(key):
+            _keysHeld[key] = t + _keyRepeatDelay
+    elif event.type == pygame.KEYUP:
+        _keysHeld.pop(pygame.key.name(event.key), None)
+    elif event.type == pygame.WINDOWFOCUSLOST:
+        # The key up events are not received without the focus.
+        _keysHeld.clear()
+    elif (event.type == pygame.MOUSEBUTTONUP) and \
+        (event.button == 3):
+        _saveToFile()
+        
+    #-------------------------------------------------------------------
+    # Begin added by Alan J. Broder
+    #-------------------------------------------------------------------
+    # Every time the mouse button is pressed, remember
+    # the mouse position as of that press.
+    elif (event.type == pygame.MOUSEBUTTONDOWN) and \
+        (event.button == 1): 
+        _mousePressed = True
+        _mousePos = event.pos                      
+    #-------------------------------------------------------------------
+    # End added by Alan J. Broder
+    #-------------------------------------------------------------------
+
+def waitForEvents(msec):
+    """
+    Wait for at most msec milliseconds for a new event (such as a key
+    typed, a key repeat or button pressed), and return as soon as one
+    occurs. Return immediately if msec is not positive.
+    """
     _makeSureWindowCreated()
+    # Wake up for the next repeat of a held key.
+    if _keysHeld:
+        msec = min(msec, min(_keysHeld.values()) - _now())
+    if _offscreen:
+        if msec > 0:
+            _enterPhase('sleep')
+            time.sleep(msec / 1000.0)
+            _exitPhase()
+        return
+    if msec > 0:
+        # pygame waits forever when the timeout is 0
+        _enterPhase('sleep')
+        event = pygame.event.wait(max(1, int(math.ceil(msec))))
+        _exitPhase()
+        if event.type != pygame.NOEVENT:
+            _handleEvent(event)
+    _checkForEvents()
 
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            sys.exit()
-        elif event.type == pygame.KEYDOWN:
-            _keysTyped = [pygame.key.name(event.key)] + _keysTyped
-        elif (event.type == pygame.MOUSEBUTTONUP) and \
-            (event.button == 3):
-            _saveToFile()
-            
-        #---------------------------------------------------------------
-        # Begin added by Alan J. Broder
-        #---------------------------------------------------------------
-        # Every time the mouse button is pressed, remember
-        # the mouse position as of that press.
-        elif (event.type == pygame.MOUSEBUTTONDOWN) and \
-            (event.button == 1): 
-            _mousePressed = True
-            _mousePos = event.pos                      
-        #---------------------------------------------------------------
-        # End added by Alan J. Broder
-        #---------------------------------------------------------------
+#-----------------------------------------------------------------------
+
+# Functions for retrieving the shown frames
+
+def isOffscreen():
+    """
+    Return True if the canvas is rendered offscreen (see setCanvasSize).
+    Otherwise return False.
+    """
+    return _offscreen
+
+def getFrame():
+    """
+    Return the frame that was shown last (by calling show or
+    showRegions) as a NumPy array of shape (height, width, 3) that
+    contains the red, green and blue components of the pixels.
+    """
+    _makeSureWindowCreated()
+    # pygame.surfarray needs NumPy and indexes the pixels as [x][y]
+    import pygame.surfarray
+    return pygame.surfarray.array3d(_background).transpose(1, 0, 2)
+
+def getFrameBytes(format='RGB'):
+    """
+    Return the frame that was shown last (by calling show or
+    showRegions) as a bytes object that contains the pixels row by row
+    from the top, each pixel in the given format ('RGB', 'RGBA' or any
+    other format of pygame.image.tostring).
+    """
+    _makeSureWindowCreated()
+    return pygame.image.tostring(_background, format)
+
+#-----------------------------------------------------------------------
+
+# Functions for profiling
+
+def setProfiler(profiler=None):
+    """
+    Notify profiler when stddraw starts and ends a phase of its work:
+    polling the input ('input'), presenting the canvas ('present') and
+    sleeping ('sleep'). profiler.enter(phase) is called at the start
+    of a phase and profiler.exit() at its end, and the phases can be
+    nested (e.g. the input is polled while presenting). If profiler is
+    None, then nothing is notified.
+    """
+    global _profiler
+    _profiler = profiler
+
+def _enterPhase(phase):
+    """
+    Notify the profiler (if any) that the given phase starts.
+    """
+    if _profiler is not None:
+        _profiler.enter(phase)
+
+def _exitPhase():
+    """
+    Notify the profiler (if any) that the last phase that started ends.
+    """
+    if _profiler is not None:
+        _profiler.exit()
 
 #-----------------------------------------------------------------------
 
@@ -674,23 +992,85 @@ def hasNextKeyTyped():
     Return True if the queue of the keys the user typed is not empty.
     Otherwise return False.
     """
-    global _keysTyped
-    return _keysTyped != []
+    return len(_keysTyped) > 0
 
 def nextKeyTyped():
     """
     Remove the first key from the queue of the keys that the user typed,
     and return that key.
     """
-    global _keysTyped
-    return _keysTyped.pop()
+    return _keysTyped.popleft()[0]
+
+def nextKeyEvent():
+    """
+    Remove the first key from the queue of the keys that the user typed,
+    and return the pair (key, time) where time is the time in
+    milliseconds at which the key was typed (or repeated).
+    """
+    return _keysTyped.popleft()
 
 def clearKeysTyped():
     """
     Clear all the keys in the queue of the keys that the user typed.
     """
-    global _keysTyped
-    _keysTyped = []
+    _keysTyped.clear()
+
+def setKeyRepeat(delay=None, interval=None, keys=None):
+    """
+    Repeat the keys while they are held down: the first repeat is put
+    in the queue of the keys typed delay milliseconds after the key is
+    pressed, and the next ones every interval milliseconds. Only the
+    keys in the list keys are repeated, or all keys if keys is None.
+    If delay is None, then the keys are not repeated.
+    """
+    global _keyRepeatDelay
+    global _keyRepeatInterval
+    global _keyRepeatKeys
+    if delay is not None:
+        if delay < 0:
+            raise Exception('The key repeat delay must be non-neg')
+        if (interval is None) or (interval <= 0):
+            raise Exception('The key repeat interval must be positive')
+    _keyRepeatDelay = delay
+    _keyRepeatInterval = interval
+    _keyRepeatKeys = None if keys is None else frozenset(keys)
+    _keysHeld.clear()
+
+def _isRepeated(key):
+    """
+    Return True if key is repeated while it is held down.
+    """
+    if _keyRepeatDelay is None:
+        return False
+    return (_keyRepeatKeys is None) or (key in _keyRepeatKeys)
+
+def _repeatHeldKeys():
+    """
+    Put the repeats of the held keys that are due in the queue of the
+    keys typed, in the order of their times. At most one repeat of each
+    key is queued per call: after a stall the missed repeats are dropped
+    and the next repeat is scheduled from now, instead of all of them
+    arriving at once.
+    """
+    if not _keysHeld:
+        return
+    now = _now()
+    repeats = []
+    for key, t in _keysHeld.items():
+        if t <= now:
+            repeats.append((key, t))
+            t += _keyRepeatInterval
+            if t <= now:
+                t = now + _keyRepeatInterval
+            _keysHeld[key] = t
+    repeats.sort(key=lambda repeat: repeat[1])
+    _keysTyped.extend(repeats)
+
+def _now():
+    """
+    Return the current time in milliseconds.
+    """
+    return time.perf_counter() * 1000.0
 
 #-----------------------------------------------------------------------
 # Begin added by Alan J. Broder
@@ -0,0 +1,113 @@
+from tetromino import Tetromino  # used for the types of the tetrominoes
+import numpy as np  # fundamental Python module for scientific computing
+
+# Class used for generating all the random values of a game from one seedable
+# random generator: the sequence of the tetromino types, the spawn columns and
+# the numbers of the tiles. The values are drawn from NumPy in batches and
+# handed out one by one, so creating a tetromino does not call the random
+# generator. With the bag option, the types are dealt from shuffled bags that
+# contain each of the 7 types once (the 7-bag randomizer).
+class PieceGenerator:
+   # the number of the values of each kind that are drawn at once
+   batch_size = 1024
+
+   # Constructor that creates a generator with the given seed (None = random)
+   def __init__(self, seed=None, bag=False):
+      self.rng = np.random.default_rng(seed)
+      self.bag = bag
+      # the values drawn but not handed out yet are the ones after the indexes
+      self.types, self.type_index = [], 0
+      self.columns, self.column_index = [], 0
+      self.values, self.value_index = [], 0
+      # the states of the random generator before each kind of the values was
+      # drawn last (None = not drawn yet), used for saving the generator
+      self.draw_states = {"types": None, "columns": None, "values": None}
+      # the (state, index) pairs of the batches of a restored state that are
+      # not drawn again yet (see set_state)
+      self.restored = {}
+
+   # Method that draws a batch of the tetromino types by using the given
+   # random generator
+   def draw_types(self, rng):
+      n = len(Tetromino.types)
+      if self.bag:
+         bags = np.tile(np.arange(n), (self.batch_size // n, 1))
+         indexes = rng.permuted(bags, axis=1).ravel()
+      else:
+         indexes = rng.integers(0, n, self.batch_size)
+      return np.array(Tetromino.types)[indexes].tolist()
+
+   # Method that draws a batch of the spawn columns (as fractions of the width
+   # of the game grid) by using the given random generator
+   def draw_columns(self, rng):
+      return rng.random(self.batch_size).tolist()
+
+   # Method that draws a batch of the tile exponents by using the given random
+   # generator as an array with a row for each tetromino
+   def draw_values(self, rng):
+      return rng.integers(1, 3, (self.batch_size, 4))
+
+   # Method that returns a new batch of the given kind of the values drawn by
+   # the given method and the index of the next value in it
+   def refill(self, kind, draw):
+      if kind in self.restored:
+         # the batch of a restored state is drawn again from the same state of
+         # the random generator (see set_state)
+         draw_state, index = self.restored.pop(kind)
+         state = self.rng.bit_generator.state
+         self.rng.bit_generator.state = draw_state
+         batch = draw(self.rng)
+         self.rng.bit_generator.state = state
+         return batch, index
+      self.draw_states[kind] = self.rng.bit_generator.state
+      return draw(self.rng), 0
+
+   # Method that returns the type of the next tetromino
+   def next_type(self):
+      if self.type_index >= len(self.types):
+         self.types, self.type_index = self.refill("types", self.draw_types)
+      self.type_index += 1
+      return self.types[self.type_index - 1]
+
+   # Method that returns a random spawn column between 0 and max_column
+   def next_column(self, max_column):
+      if self.column_index >= len(self.columns):
+         self.columns, self.column_index = self.refill("columns",
+                                                      self.draw_columns)
+      self.column_index += 1
+      return int(self.columns[self.column_index - 1] * (max_column + 1))
+
+   # Method that returns the exponents of the numbers of the four tiles of
+   # the next tetromino (1 or 2 for the numbers 2 or 4)
+   def next_values(self):
+      if self.value_index >= len(self.values):
+         self.values, self.value_index = self.refill("values",
+                                                    self.draw_values)
+      self.value_index += 1
+      return self.values[self.value_index - 1].tolist()
+
+   # Method that returns the state of the generator as a dictionary: the state
+   # of the random generator and, for each kind of the values, the state of
+   # the random generator before its batch was drawn and the index in it (the
+   # batches are not stored, they are drawn again after set_state)
+   def get_state(self):
+      state = {"rng": self.rng.bit_generator.state, "bag": self.bag,
+               "types": (self.draw_states["types"], self.type_index),
+               "columns": (self.draw_states["columns"], self.column_index),
+               "values": (self.draw_states["values"], self.value_index)}
+      state.update(self.restored)
+      return state
+
+   # Method that restores the state of the generator returned by get_state,
+   # the batches are drawn again when their next values are needed
+   def set_state(self, state):
+      self.rng.bit_generator.state = state["rng"]
+      self.bag = state["bag"]
+      self.types, self.type_index = [], 0
+      self.columns, self.column_index = [], 0
+      self.values, self.value_index = [], 0
+      self.restored = {}
+      for kind in self.draw_states:
+         self.draw_states[kind] = state[kind][0]
+         if state[kind][0] is not None:
+            self.restored[kind] = state[kind]
@@ -1,21 +1,39 @@
-# A class for modeling a point as a location in 2D space
+# A class for modeling a point as a location in 2D space, points are immutable
+# so that they can be shared (e.g. by the tiles) without copying them
 class Point:
+   # the points have no instance dictionaries, only these two attributes
+   __slots__ = ("x", "y")
+
    # constructor that creates a point at the given (x,y) location
    # default values for the given location are set as x = 0 and y = 0
    def __init__(self, x = 0, y = 0):
-      self.x = x
-      self.y = y
+      object.__setattr__(self, "x", x)
+      object.__setattr__(self, "y", y)
+
+   # the coordinates of a point cannot be changed after it is created
+   def __setattr__(self, name, value):
+      raise AttributeError("points are immutable")
 
-   # moves this point by dx along the x axis and by dy along the y axis
+   # returns the point moved by dx along the x axis and by dy along the y axis
    def translate(self, dx, dy):
-      self.x += dx
-      self.y += dy
+      return Point(self.x + dx, self.y + dy)
 
-   # moves this point to a given location (x, y)
+   # returns the point at a given location (x, y)
    def move(self, x, y):
-      self.x = x
-      self.y = y
+      return Point(x, y)
+
+   # points are pickled (e.g. for the processes of the auto player) and copied
+   # by creating them again from their coordinates
+   def __reduce__(self):
+      return (Point, (self.x, self.y))
+
+   # points with the same coordinates are equal
+   def __eq__(self, other):
+      return isinstance(other, Point) and (self.x, self.y) == (other.x, other.y)
+
+   def __hash__(self):
+      return hash((self.x, self.y))
 
    # overloaded __str__ method (automatically invoked when printing a point)
    def __str__(self):
-      return "(" + str(self.x) + ", " + str(self.y) + ")"
\ No newline at end of file
+      return "(" + str(self.x) + ", " + str(self.y) + ")"
@@ -0,0 +1,143 @@
+import lib.stddraw as stddraw  # notifies the profiler of its own phases
+from game_engine import GameEngine  # the rules of the game (logic)
+from game_grid import GameGrid  # the rendering of the game grid
+from tile import Tile  # used for drawing the tiles
+from collections import deque  # used for the rolling window of the frames
+import time  # used for measuring the elapsed time
+
+# Class used for measuring where the time of each frame of the game loop goes,
+# split into phases: polling the input, the logic (the rules of the game),
+# rendering, presenting the canvas and sleeping. The time is attributed to the
+# innermost phase that is running, so e.g. presenting the canvas inside
+# GameGrid.display does not count as rendering. The methods of the game are
+# timed only while the profiler is installed (all the times are in ms).
+class Profiler:
+   # the phases of a frame in the order they are reported
+   phases = ["input", "logic", "render", "present", "sleep"]
+   # the methods that are timed as (class, method name, phase) triples
+   methods = [(GameEngine, "move", "logic"), (GameEngine, "rotate", "logic"),
+              (GameEngine, "drop", "logic"), (GameEngine, "step", "logic"),
+              (GameEngine, "update_grid", "logic"),
+              (GameEngine, "merge", "logic"),
+              (GameEngine, "check_grid", "logic"),
+              (GameEngine, "delete_tile", "logic"),
+              (GameGrid, "display", "render"), (Tile, "draw", "render")]
+   # the timed methods whose times are reported under their phases and the
+   # labels used for them in the report
+   reported_methods = {"GameEngine.move": "move",
+                       "GameEngine.update_grid": "update_grid",
+                       "GameEngine.merge": "merge",
+                       "GameEngine.check_grid": "check_grid",
+                       "GameEngine.delete_tile": "delete_tile",
+                       "GameGrid.display": "display", "Tile.draw": "Tile.draw"}
+
+   # Constructor that creates a profiler that reports the average and the
+   # maximum times over the last window frames
+   def __init__(self, window=60):
+      self.frames = deque(maxlen=window)
+      # the phases that are running (innermost last) and the time at which the
+      # time spent since is attributed to the innermost one
+      self.stack = []
+      self.mark = None
+      # the times of the phases and of the timed methods in this frame
+      self.phase_times = dict.fromkeys(Profiler.phases, 0.0)
+      self.method_times = {}
+      self.frame_start = None
+      # the original methods replaced by the install method
+      self.originals = []
+
+   # Method that returns the current time
+   def now(self):
+      return time.perf_counter() * 1000
+
+   # Method that starts timing the methods of the game and stddraw
+   def install(self):
+      if self.is_installed():
+         return
+      for cls, name, phase in Profiler.methods:
+         method = cls.__dict__[name]
+         self.originals.append((cls, name, method))
+         setattr(cls, name, self.timed(method, cls.__name__ + "." + name,
+                                       phase))
+      stddraw.setProfiler(self)
+      self.stack = []
+      self.frame_start = self.now()
+
+   # Method that returns True if the profiler is installed
+   def is_installed(self):
+      return len(self.originals) > 0
+
+   # Method that stops timing and restores the original methods
+   def uninstall(self):
+      stddraw.setProfiler(None)
+      for cls, name, method in self.originals:
+         setattr(cls, name, method)
+      self.originals = []
+      self.frames.clear()
+
+   # Method that returns a replacement of the given method that runs it as
+   # the given phase and adds its time to the time of the given name
+   def timed(self, method, name, phase):
+      def timed_method(*args, **kwargs):
+         start = self.enter(phase)
+         try:
+            return method(*args, **kwargs)
+         finally:
+            self.exit()
+            self.method_times[name] = self.method_times.get(name, 0.0) + \
+               (self.mark - start)
+      return timed_method
+
+   # Method that is called when the given phase starts, the start time is
+   # returned
+   def enter(self, phase):
+      now = self.now()
+      if self.stack:
+         self.phase_times[self.stack[-1]] += now - self.mark
+      self.stack.append(phase)
+      self.mark = now
+      return now
+
+   # Method that is called when the innermost phase that is running ends
+   def exit(self):
+      now = self.now()
+      self.phase_times[self.stack.pop()] += now - self.mark
+      self.mark = now
+
+   # Method that is called after each frame is rendered, the times of the
+   # frame are added to the rolling window
+   def end_frame(self):
+      now = self.now()
+      self.frames.append((now, now - self.frame_start, self.phase_times,
+                          self.method_times))
+      self.phase_times = dict.fromkeys(Profiler.phases, 0.0)
+      self.method_times = {}
+      self.frame_start = now
+
+   # Method that returns the frame rate over the rolling window
+   def get_fps(self):
+      if len(self.frames) < 2:
+         return 0.0
+      elapsed = self.frames[-1][0] - self.frames[0][0]
+      return 1000 * (len(self.frames) - 1) / elapsed if elapsed > 0 else 0.0
+
+   # Method that returns the report of the rolling window as a list of text
+   # lines: the frame rate, and the average and the maximum time per frame of
+   # each phase (and of the methods timed for it) and of the whole frame
+   def get_report(self):
+      lines = ["FPS %.1f   avg / max ms" % self.get_fps()]
+      n = max(1, len(self.frames))
+      def line(label, times):
+         times = list(times)
+         return "%s %.2f / %.2f" % (label, sum(times) / n,
+                                    max(times, default=0))
+      for phase in Profiler.phases:
+         lines.append(line(phase, (f[2][phase] for f in self.frames)))
+         for cls, name, method_phase in Profiler.methods:
+            key = cls.__name__ + "." + name
+            if method_phase == phase and key in Profiler.reported_methods:
+               label = Profiler.reported_methods[key]
+               lines.append(line("  " + label,
+                                 (f[3].get(key, 0.0) for f in self.frames)))
+      lines.append(line("frame", (f[1] for f in self.frames)))
+      return lines
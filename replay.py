@@ -0,0 +1,103 @@
+import os  # used for creating the directory of the replay files
+
+# Class used for recording a game as a replay and for playing it back. A game
+# is determined by the seed of its random generator, the size of its grid and
+# the keys typed at each gravity tick, so a replay stores only these. Replays
+# are stored as text files with a header and one line for each key:
+#
+#    tetris2048-replay 2
+#    seed 1234
+#    grid 18 12
+#    0 left
+#    3 space
+#    end 420 1288
+#
+# where each key line has the number of the gravity ticks before the key was
+# typed and the last line (if any) has the number of the gravity ticks and the
+# score at the end of the game
+class Replay:
+   # the first line of the replay files and the version of their format
+   header, version = "tetris2048-replay", 2
+
+   # Constructor that creates a replay of the game with the given seed and grid
+   # size, the keys are given as (tick, key) pairs
+   def __init__(self, seed, grid_h, grid_w, inputs=None):
+      self.seed = seed
+      self.grid_h, self.grid_w = grid_h, grid_w
+      self.inputs = [] if inputs is None else inputs
+      # the number of the gravity ticks and the score at the end of the game
+      # (None if the game did not end)
+      self.end_tick, self.end_score = None, None
+      # the index of the next input to play back
+      self.position = 0
+      # the file the inputs are written to while they are recorded
+      self.file = None
+
+   # Method that starts writing the replay to the file with the given path, the
+   # inputs are written as they are recorded so that the replay is not lost if
+   # the program exits
+   def record_to(self, path):
+      directory = os.path.dirname(path)
+      if directory:
+         os.makedirs(directory, exist_ok=True)
+      self.file = open(path, "w")
+      self.file.write("%s %d\n" % (Replay.header, Replay.version))
+      self.file.write("seed %d\n" % self.seed)
+      self.file.write("grid %d %d\n" % (self.grid_h, self.grid_w))
+      for tick, key in self.inputs:
+         self.file.write("%d %s\n" % (tick, key))
+      self.file.flush()
+
+   # Method that records the given key typed after the given number of gravity
+   # ticks
+   def record(self, tick, key):
+      self.inputs.append((tick, key))
+      if self.file is not None:
+         self.file.write("%d %s\n" % (tick, key))
+         self.file.flush()
+
+   # Method that records the end of the game after the given number of gravity
+   # ticks with the given score and closes the file of the replay
+   def finish(self, tick, score):
+      self.end_tick, self.end_score = tick, score
+      if self.file is not None:
+         self.file.write("end %d %d\n" % (tick, score))
+         self.file.close()
+         self.file = None
+
+   # Method that returns the keys typed after the given number of gravity ticks
+   # that have not been played back yet
+   def get_keys(self, tick):
+      keys = []
+      while self.position < len(self.inputs) and \
+            self.inputs[self.position][0] <= tick:
+         keys.append(self.inputs[self.position][1])
+         self.position += 1
+      return keys
+
+   # Method that returns True if all the inputs are played back
+   def is_played(self):
+      return self.position >= len(self.inputs)
+
+   # Method that returns the replay read from the file with the given path
+   @staticmethod
+   def load(path):
+      with open(path) as file:
+         lines = file.read().split("\n")
+      header = lines[0].split()
+      if len(header) != 2 or header[0] != Replay.header:
+         raise ValueError(path + " is not a replay file")
+      if int(header[1]) != Replay.version:
+         raise ValueError("unsupported replay version " + header[1])
+      seed = int(lines[1].split()[1])
+      grid_h, grid_w = [int(value) for value in lines[2].split()[1:]]
+      replay = Replay(seed, grid_h, grid_w)
+      for line in lines[3:]:
+         fields = line.split()
+         if len(fields) == 0:
+            continue
+         if fields[0] == "end":
+            replay.end_tick, replay.end_score = int(fields[1]), int(fields[2])
+         else:
+            replay.inputs.append((int(fields[0]), fields[1]))
+      return replay
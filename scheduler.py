@@ -0,0 +1,67 @@
+import time  # used for measuring the elapsed time
+
+# Class used for scheduling the gravity ticks and the frames of the game loop
+# on their own clocks, so that the input can be handled as soon as it arrives
+# (all the times are in milliseconds)
+class Scheduler:
+   # the most gravity ticks that are run at once to catch up after a hitch,
+   # the remaining missed ticks are dropped
+   max_catch_up_ticks = 5
+   # the shortest gravity interval, shorter (or zero) intervals are clamped to
+   # it so that the loop cannot spin on the gravity ticks
+   min_gravity_interval = 10
+
+   # Constructor that creates a scheduler with the given gravity interval and
+   # frame rate cap, the clock returns the current time in milliseconds
+   def __init__(self, gravity_interval, frame_rate=60, clock=None):
+      self.gravity_interval = gravity_interval
+      self.frame_interval = 1000 / frame_rate
+      if clock is None:
+         clock = lambda: time.perf_counter() * 1000
+      self.clock = clock
+      now = self.now()
+      # the times of the next gravity tick and the earliest next frame
+      self.next_gravity = now + self.get_gravity_interval()
+      self.next_frame = now
+
+   # Method that returns the interval between the gravity ticks (clamped to
+   # min_gravity_interval)
+   def get_gravity_interval(self):
+      return max(self.gravity_interval, Scheduler.min_gravity_interval)
+
+   # Method that returns the current time
+   def now(self):
+      return self.clock()
+
+   # Method that returns the number of gravity ticks due at the given time
+   def gravity_ticks(self, now):
+      interval = self.get_gravity_interval()
+      ticks = 0
+      while now >= self.next_gravity and ticks < Scheduler.max_catch_up_ticks:
+         ticks += 1
+         self.next_gravity += interval
+      # drop the ticks missed by a long hitch instead of running them later
+      if now >= self.next_gravity:
+         self.next_gravity = now + interval
+      return ticks
+
+   # Method that restarts the gravity clock at the given time (e.g. while the
+   # game is paused)
+   def reset_gravity(self, now):
+      self.next_gravity = now + self.get_gravity_interval()
+
+   # Method that returns True if a frame can be rendered at the given time
+   # (the frame rate cap allows it) and schedules the earliest next frame
+   def frame_due(self, now):
+      if now < self.next_frame:
+         return False
+      self.next_frame = max(self.next_frame + self.frame_interval, now)
+      return True
+
+   # Method that returns the time from the given time until the next gravity
+   # tick or, if a frame is waiting to be rendered, until the next frame
+   def time_until_next(self, now, frame_pending):
+      wait = self.next_gravity - now
+      if frame_pending:
+         wait = min(wait, self.next_frame - now)
+      return max(0, wait)
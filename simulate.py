@@ -0,0 +1,173 @@
+'''
+Batch simulator for the score distributions of the game
+
+Usage: python simulate.py [--games 1000] [--seed 0] [--policy greedy]
+                          [--output results.jsonl]
+
+Runs headless games with the seeds seed, seed + 1, ..., seed + games - 1 on
+all the cores. Each game is played by the chosen policy:
+
+   random    moves and rotates each tetromino randomly and drops it
+   greedy    places each tetromino where the auto player scores the game grid
+             best (without looking ahead to the next tetromino)
+   scripted  types the keys of the next line of the script file for each
+             tetromino (the lines are repeated from the first one at the end,
+             space locks the tetromino and the keys after it are ignored)
+
+The result of each game is written to the output file as a JSON line as soon
+as the game ends, and the percentiles of the results are printed at the end.
+'''
+
+from game_engine import GameEngine  # the rules of the game
+from autoplayer import AutoPlayer  # used for the greedy policy
+import numpy as np  # fundamental Python module for scientific computing
+import multiprocessing  # used for running the games on all cores
+import argparse  # used for parsing the command line arguments
+import random  # used for the random policy
+import json  # used for writing the results
+import time  # used for measuring the elapsed time
+
+# the results of each game in the order they are written and printed
+fields = ["score", "pieces", "lines", "merges", "biggest_tile", "ticks",
+          "seconds"]
+# the percentiles of the results that are printed
+percentiles = [10, 25, 50, 75, 90, 99]
+# the auto player used for the greedy policy in each process (it is created
+# when it is first used)
+greedy_player = None
+
+# Function that returns the keys typed by the random policy for the current
+# tetromino of the given game engine by using the given random generator
+def random_keys(engine, rng):
+   keys = ["up"] * rng.randint(0, 3)
+   keys += [rng.choice(["left", "right"])] * rng.randint(0, engine.grid_width)
+   return keys + ["space"]
+
+# Function that returns the keys typed by the greedy policy for the current
+# tetromino of the given game engine
+def greedy_keys(engine):
+   global greedy_player
+   if greedy_player is None:
+      greedy_player = AutoPlayer(processes=0, lookahead=False)
+   return greedy_player.get_keys(engine)
+
+# Function that plays the game with the given seed and grid size by using the
+# given policy until the game is over or max_pieces tetrominoes are placed, the
+# results of the game are returned as a dictionary
+def play_game(seed, grid_h, grid_w, policy, script, max_pieces):
+   engine = GameEngine(grid_h, grid_w, seed)
+   engine.spawn()
+   rng = random.Random(seed)
+   pieces, ticks, milliseconds, biggest = 0, 0, 0, 0
+   while not engine.game_over and pieces < max_pieces:
+      if policy == "random":
+         keys = random_keys(engine, rng)
+      elif policy == "greedy":
+         keys = greedy_keys(engine)
+      else:
+         keys = script[pieces % len(script)]
+      locked = False
+      for key in keys:
+         if key == "up":
+            engine.rotate()
+         elif key == "space":
+            # hard drop: the tetromino is dropped and locked at once by a
+            # gravity tick, the ticks and the time are counted as if it fell
+            # by one row at each gravity tick instead (the keys after it are
+            # ignored)
+            fallen = engine.drop()
+            engine.step()
+            ticks += fallen + 1
+            milliseconds += (fallen + 1) * engine.speed
+            locked = True
+            break
+         else:
+            engine.move(key)
+      # without a hard drop the tetromino falls at each gravity tick until it
+      # is locked
+      while not locked:
+         ticks += 1
+         milliseconds += engine.speed
+         locked = not engine.step()
+      pieces += 1
+      biggest = max(biggest, int(engine.tile_matrix.max()))
+   return {"seed": seed, "score": engine.score, "pieces": pieces,
+           "lines": engine.lines_cleared, "merges": engine.merges,
+           "biggest_tile": 2 ** biggest if biggest > 0 else 0,
+           "ticks": ticks, "seconds": milliseconds / 1000,
+           "game_over": engine.game_over}
+
+# Function that runs play_game with the given tuple of arguments (used by the
+# pool of processes)
+def run_game(args):
+   return play_game(*args)
+
+# Function that returns the keys of the script file with the given path as a
+# list with the keys of each tetromino
+def load_script(path):
+   with open(path) as file:
+      script = [line.split() for line in file]
+   script = [keys for keys in script if keys and not keys[0].startswith("#")]
+   if not script:
+      raise ValueError(path + " has no keys")
+   return script
+
+# Function that prints the mean and the percentiles of each field of the given
+# results
+def print_percentiles(results):
+   print("%-14s %10s" % ("", "mean") +
+         "".join("%10s" % ("p%d" % p) for p in percentiles))
+   for field in fields:
+      values = np.array([result[field] for result in results], dtype=float)
+      print("%-14s %10.1f" % (field, values.mean()) +
+            "".join("%10.1f" % value
+                    for value in np.percentile(values, percentiles)))
+
+# Main function where the simulator starts execution
+def main():
+   parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+   parser.add_argument("--games", type=int, default=1000,
+                       help="the number of the games")
+   parser.add_argument("--seed", type=int, default=0,
+                       help="the seed of the first game")
+   parser.add_argument("--policy", choices=["random", "greedy", "scripted"],
+                       default="greedy", help="the policy that plays the games")
+   parser.add_argument("--script", metavar="FILE",
+                       help="the keys of the scripted policy")
+   parser.add_argument("--grid", type=int, nargs=2, default=[18, 12],
+                       metavar=("H", "W"), help="the size of the game grid")
+   parser.add_argument("--max-pieces", type=int, default=1000,
+                       help="the number of the tetrominoes a game ends after")
+   parser.add_argument("--processes", type=int, default=None,
+                       help="the number of the processes (default: cores)")
+   parser.add_argument("--output", default="simulation_results.jsonl",
+                       help="the file the results are written to")
+   args = parser.parse_args()
+   if args.policy == "scripted":
+      if args.script is None:
+         parser.error("the scripted policy needs a --script file")
+      script = load_script(args.script)
+   else:
+      script = None
+   grid_h, grid_w = args.grid
+   games = [(seed, grid_h, grid_w, args.policy, script, args.max_pieces)
+            for seed in range(args.seed, args.seed + args.games)]
+   results = []
+   start = time.perf_counter()
+   with multiprocessing.Pool(args.processes) as pool, \
+        open(args.output, "w") as file:
+      # the games are handed out in small chunks and their results are written
+      # in the order they end
+      for result in pool.imap_unordered(run_game, games, chunksize=4):
+         file.write(json.dumps(result) + "\n")
+         file.flush()
+         results.append(result)
+         if len(results) % 100 == 0:
+            print("%d / %d games" % (len(results), args.games), flush=True)
+   print("%d games in %.1f s, results written to %s" % (len(results),
+         time.perf_counter() - start, args.output))
+   if results:
+      print_percentiles(results)
+
+if __name__ == '__main__':
+   main()
@@ -0,0 +1,205 @@
+from game_engine import GameEngine  # the rules of the game
+from tetromino import Tetromino, shapes, orientations  # the tetrominoes
+from piece_generator import PieceGenerator  # the random values of the game
+from point import Point  # used for tile positions
+import numpy as np  # fundamental Python module for scientific computing
+import struct  # used for packing the values into bytes
+import os  # used for creating the directory of the snapshot files
+
+# A snapshot stores the whole state of a game engine as bytes, so that a game
+# can be saved and resumed exactly, random generator included. All the values
+# are little-endian and are packed in this order:
+#
+#    header      magic bytes and the version of the format
+#    game        grid_h, grid_w, score, speed, game_over, lines_cleared, merges
+#    2 pieces    the current and the next tetromino: present, type (index in
+#                Tetromino.types), orientation, x and y of the bottom left
+#                cell and the exponents of the 4 tiles
+#    board       the tile exponents of the tile matrix, grid_h * grid_w bytes
+#    generator   present, bag, the indexes of the types, the columns and the
+#                values in their batches, the state of the PCG64 bit generator
+#                and its states before the batches were drawn (see
+#                PieceGenerator.get_state), each as present, state, inc,
+#                has_uint32 and uinteger
+magic, version = b"T2048S", 1
+header_format = struct.Struct("<6sH")
+game_format = struct.Struct("<HHqiBII")
+piece_format = struct.Struct("<BBBhh4B")
+generator_format = struct.Struct("<BBHHH")
+rng_format = struct.Struct("<B16s16sBI")
+# the largest tile exponent of a snapshot (the numbers of the tiles must fit in
+# 64-bit integers, see to_numbers)
+max_exponent = 62
+
+# Function that returns the bytes of the given tetromino (None = no tetromino)
+def pack_piece(tetromino):
+   if tetromino is None:
+      return piece_format.pack(0, 0, 0, 0, 0, 0, 0, 0, 0)
+   return piece_format.pack(1, Tetromino.types.index(tetromino.type),
+                            tetromino.orientation, tetromino.bottom_left_cell.x,
+                            tetromino.bottom_left_cell.y, *tetromino.values)
+
+# Function that returns the tetromino stored in the given bytes at the given
+# offset for a game grid with the given size (None if there is none)
+def unpack_piece(data, offset, grid_h, grid_w):
+   present, type, orientation, x, y, *values = \
+      piece_format.unpack_from(data, offset)
+   if not present:
+      return None
+   if type >= len(Tetromino.types) or orientation >= 4 or \
+         max(values) > max_exponent:
+      raise ValueError("invalid tetromino in the snapshot")
+   # the tiles must be inside the game grid or at most the size of the
+   # tetromino above it
+   type = Tetromino.types[type]
+   n = shapes[type][0]
+   for dx, dy in orientations[type][orientation].offsets:
+      if not (0 <= x + dx < grid_w and 0 <= y + dy <= grid_h + n):
+         raise ValueError("tetromino outside the game grid in the snapshot")
+   # the tetromino is not created with its constructor, which would draw new
+   # random values
+   tetromino = Tetromino.__new__(Tetromino)
+   tetromino.grid_height, tetromino.grid_width = grid_h, grid_w
+   tetromino.type = type
+   tetromino.orientation = orientation
+   tetromino.bottom_left_cell = Point(x, y)
+   tetromino.values = values
+   return tetromino
+
+# Function that returns the bytes of the given state of a PCG64 bit generator
+# (None = no state)
+def pack_rng_state(state):
+   if state is None:
+      return rng_format.pack(0, b"", b"", 0, 0)
+   if state["bit_generator"] != "PCG64":
+      raise ValueError("unsupported bit generator " + state["bit_generator"])
+   return rng_format.pack(1, state["state"]["state"].to_bytes(16, "little"),
+                          state["state"]["inc"].to_bytes(16, "little"),
+                          state["has_uint32"], state["uinteger"])
+
+# Function that returns the state of a PCG64 bit generator stored in the given
+# bytes at the given offset (None if there is none)
+def unpack_rng_state(data, offset):
+   present, pcg_state, inc, has_uint32, uinteger = \
+      rng_format.unpack_from(data, offset)
+   if not present:
+      return None
+   return {"bit_generator": "PCG64",
+           "state": {"state": int.from_bytes(pcg_state, "little"),
+                     "inc": int.from_bytes(inc, "little")},
+           "has_uint32": has_uint32, "uinteger": uinteger}
+
+# Function that returns the bytes of the given piece generator (None = no
+# generator), see PieceGenerator.get_state
+def pack_generator(generator):
+   if generator is None:
+      return generator_format.pack(0, 0, 0, 0, 0)
+   state = generator.get_state()
+   return generator_format.pack(1, state["bag"], state["types"][1],
+                                state["columns"][1], state["values"][1]) + \
+      b"".join(pack_rng_state(rng_state) for rng_state in
+               [state["rng"], state["types"][0], state["columns"][0],
+                state["values"][0]])
+
+# Function that returns the state of the piece generator stored in the given
+# bytes at the given offset (None if there is none), see
+# PieceGenerator.set_state
+def unpack_generator(data, offset):
+   present, bag, type_index, column_index, value_index = \
+      generator_format.unpack_from(data, offset)
+   if not present:
+      return None
+   offset += generator_format.size
+   rng, types, columns, values = [
+      unpack_rng_state(data, offset + i * rng_format.size) for i in range(4)]
+   if rng is None:
+      raise ValueError("the snapshot has no random generator state")
+   if max(type_index, column_index, value_index) > PieceGenerator.batch_size:
+      raise ValueError("invalid piece generator in the snapshot")
+   return {"rng": rng, "bag": bool(bag), "types": (types, type_index),
+           "columns": (columns, column_index),
+           "values": (values, value_index)}
+
+# Function that returns the snapshot of the given game engine as bytes
+def dumps(engine):
+   return b"".join([
+      header_format.pack(magic, version),
+      game_format.pack(engine.grid_height, engine.grid_width, engine.score,
+                       engine.speed, engine.game_over, engine.lines_cleared,
+                       engine.merges),
+      pack_piece(engine.current_tetromino), pack_piece(engine.next_tetromino),
+      engine.tile_matrix.astype(np.uint8, copy=False).tobytes(),
+      pack_generator(engine.generator)])
+
+# Function that restores the game from the given snapshot bytes into the given
+# game engine (e.g. the game grid of a running game, whose grid size must be
+# the same) or into a new game engine, the game engine is returned. A
+# ValueError is raised for bytes that are not a whole valid snapshot, and the
+# given game engine is then left unchanged
+def loads(data, engine=None):
+   if len(data) < header_format.size + game_format.size or \
+         header_format.unpack_from(data)[0] != magic:
+      raise ValueError("not a snapshot")
+   snapshot_version = header_format.unpack_from(data)[1]
+   if snapshot_version != version:
+      raise ValueError("unsupported snapshot version %d" % snapshot_version)
+   offset = header_format.size
+   grid_h, grid_w, score, speed, game_over, lines_cleared, merges = \
+      game_format.unpack_from(data, offset)
+   offset += game_format.size
+   if engine is not None and \
+         (engine.grid_height, engine.grid_width) != (grid_h, grid_w):
+      raise ValueError("the snapshot is of a %dx%d game grid" % (grid_h,
+                                                                   grid_w))
+   # the size of the rest of the snapshot follows from the grid size and
+   # whether it has a piece generator
+   size = offset + 2 * piece_format.size + grid_h * grid_w
+   if len(data) > size and data[size]:
+      size += generator_format.size + 4 * rng_format.size
+   else:
+      size += generator_format.size
+   if len(data) != size:
+      raise ValueError("the snapshot is truncated or corrupt")
+   if grid_h == 0 or grid_w == 0 or speed <= 0:
+      raise ValueError("invalid game in the snapshot")
+   # everything is unpacked before the game engine is changed
+   current_tetromino = unpack_piece(data, offset, grid_h, grid_w)
+   offset += piece_format.size
+   next_tetromino = unpack_piece(data, offset, grid_h, grid_w)
+   offset += piece_format.size
+   tile_matrix = np.frombuffer(data, np.uint8, grid_h * grid_w, offset
+                               ).reshape(grid_h, grid_w).copy()
+   if tile_matrix.max() > max_exponent:
+      raise ValueError("invalid tile in the snapshot")
+   offset += grid_h * grid_w
+   generator_state = unpack_generator(data, offset)
+   if engine is None:
+      engine = GameEngine(grid_h, grid_w)
+   if generator_state is None:
+      engine.generator = None
+   else:
+      if engine.generator is None:
+         engine.generator = PieceGenerator()
+      engine.generator.set_state(generator_state)
+   engine.score, engine.speed, engine.game_over = score, speed, bool(game_over)
+   engine.lines_cleared, engine.merges = lines_cleared, merges
+   engine.current_tetromino = current_tetromino
+   engine.next_tetromino = next_tetromino
+   engine.tile_matrix = tile_matrix
+   engine.occupancy = None
+   return engine
+
+# Function that saves the snapshot of the given game engine to the file with
+# the given path
+def save(engine, path):
+   directory = os.path.dirname(path)
+   if directory:
+      os.makedirs(directory, exist_ok=True)
+   with open(path, "wb") as file:
+      file.write(dumps(engine))
+
+# Function that restores the game from the snapshot file with the given path
+# (see loads), the game engine is returned
+def load(path, engine=None):
+   with open(path, "rb") as file:
+      return loads(file.read(), engine)
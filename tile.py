@@ -1,35 +1,61 @@
 import lib.stddraw as stddraw  # stddraw is used as a basic graphics library
 from lib.color import Color  # used for coloring the tile and the number on it
 from point import Point
-import copy as cp
-from random import randint
+from collections import OrderedDict  # used for the least recently used sprites
 
 # Class used for modeling numbered tiles as in 2048
 class Tile: 
+   # the tiles have no instance dictionaries, only these two attributes
+   __slots__ = ("number", "position")
+
    # Class attributes shared among all Tile objects
    # ---------------------------------------------------------------------------
+   # the colors of the numbers and of the boxes around the tiles
+   foreground_color = Color(167, 153, 140)
+   boundary_color = Color(167, 153, 140)
+   # the background and the foreground colors of the tiles by their numbers,
+   # the colors are created once and shared by all the tiles
+   light_number_color = Color(248, 240, 232)
+   palette = {2: (Color(238, 228, 218), foreground_color),
+              4: (Color(238, 225, 201), foreground_color),
+              8: (Color(243, 178, 122), light_number_color),
+              16: (Color(246, 150, 100), light_number_color),
+              32: (Color(247, 124, 95), light_number_color),
+              64: (Color(246, 94, 59), light_number_color),
+              128: (Color(237, 207, 114), light_number_color),
+              256: (Color(237, 204, 97), light_number_color),
+              512: (Color(237, 200, 80), light_number_color),
+              1024: (Color(237, 197, 63), light_number_color),
+              2048: (Color(237, 194, 46), light_number_color)}
    # value used for the thickness of the boxes (boundaries) around the tiles
    boundary_thickness = 0.004
    # font family and size used for displaying the tile number
    font_family, font_size = "Helvetica Neue", 30
+   # pre-rendered tiles (sprites) keyed by the tile number, the sprites are
+   # rendered again when the scale of the canvas changes
+   sprites = {}
+   sprite_scale = None
+   # sprites of the rarely seen numbers above 2048 in least recently used
+   # order, at most max_rare_sprites of them are kept
+   rare_sprites = OrderedDict()
+   max_rare_sprites = 8
 
    # Constructor that creates a tile at a given position with 2 as its number
-   def __init__(self, position = Point(0, 0)): # (0, 0) is the default position
+   # by default (the numbers of the tiles are determined by the game engine)
+   def __init__(self, position = Point(0, 0), number = 2): # (0, 0) is the default position
       # set the number on the tile
-      self.number = 2**randint(1,2)
-      # set the colors of the tile
-      self.foreground_color = Color(167, 153, 140)  # foreground (number) color
-      self.boundary_color = Color(167, 153, 140)
-      # set the poisiton of the tile
-      self.position = Point(position.x, position.y)
+      self.number = number
+      # set the poisiton of the tile (points are immutable, so the given point
+      # is shared)
+      self.position = position
 
    # set the rotation of tile
    def set_position(self, position):
-      self.position = cp.copy(position)
+      self.position = position
 
    # get the position of the tile
    def get_position(self):
-      return cp.copy(self.position)
+      return self.position
 
    # use for the tile number (2, 4, 8, 16,...)
    def double(self):
@@ -37,72 +63,66 @@ class Tile:
 
    # move the tetrominos to left, right and down
    def move_tetro(self, x, y):
-      self.position.translate(x, y)
+      self.position = self.position.translate(x, y)
 
-   # Method for drawing the tile
+   # Method for drawing the tile by using its pre-rendered sprite
    def draw(self):
+      stddraw.picture(self.get_sprite(), self.position.x, self.position.y)
+
+   # Method that returns the sprite of the tile number from the cache, it is
+   # rendered if it is not in the cache
+   def get_sprite(self):
+      # the cached sprites are dropped when the scale of the canvas changes
+      scale = stddraw.getScale()
+      if scale != Tile.sprite_scale:
+         Tile.sprites.clear()
+         Tile.rare_sprites.clear()
+         Tile.sprite_scale = scale
+      if self.number <= 2048:
+         sprite = Tile.sprites.get(self.number)
+         if sprite is None:
+            sprite = self.render_sprite()
+            Tile.sprites[self.number] = sprite
+         return sprite
+      # the least recently used sprite is evicted for the numbers above 2048
+      sprite = Tile.rare_sprites.get(self.number)
+      if sprite is None:
+         sprite = self.render_sprite()
+         Tile.rare_sprites[self.number] = sprite
+         if len(Tile.rare_sprites) > Tile.max_rare_sprites:
+            Tile.rare_sprites.popitem(last=False)
+      else:
+         Tile.rare_sprites.move_to_end(self.number)
+      return sprite
+
+   # Method for rendering the tile with its background, frame and number as a
+   # picture centered on (0, 0)
+   def render_sprite(self):
       # set the tile background and foreground color
-      if (self.number == 2):
-         self.background_color = Color(238, 228, 218)
-
-      if (self.number == 4):
-         self.background_color = Color(238, 225, 201)
-
-      if (self.number == 8):
-         self.background_color = Color(243, 178, 122)
-         self.foreground_color = Color(248, 240, 232)
-
-      if (self.number == 16):
-         self.background_color = Color(246, 150, 100)
-         self.foreground_color = Color(248, 240, 232)
-
-      if (self.number == 32):
-         self.background_color = Color(247, 124, 95)
-         self.foreground_color = Color(248, 240, 232)
-
-      if (self.number == 64):
-         self.background_color = Color(246, 94, 59)
-         self.foreground_color = Color(248, 240, 232)
-
-      if (self.number == 128):
-         self.background_color = Color(237, 207, 114)
-         self.foreground_color = Color(248, 240, 232)
-
-      if (self.number == 256):
-         self.background_color = Color(237, 204, 97)
-         self.foreground_color = Color(248, 240, 232)
-
-      if (self.number == 512):
-         self.background_color = Color(237, 200, 80)
-         self.foreground_color = Color(248, 240, 232)
-
-      if (self.number == 1024):
-         self.background_color = Color(237, 197, 63)
-         self.foreground_color = Color(248, 240, 232)
-
-      if (self.number == 2048):
-         self.background_color = Color(237, 194, 46)
-         self.foreground_color = Color(248, 240, 232)
-
+      if self.number in Tile.palette:
+         background_color, foreground_color = Tile.palette[self.number]
       # For the color of the tiles with numbers greater than 2048,
       # we created an if condition by looking at the darkening ratio
       # of the numbers above.
-      if (self.number > 2048):
-         self.background_color= Color((237),(194 - self.number/1365),(46 - self.number/800))
-         self.foreground_color = Color(248, 240, 232)
+      else:
+         background_color = Color((237),max(0, int(194 - self.number/1365)),max(0, int(46 - self.number/800)))
+         foreground_color = Tile.light_number_color
+
+      stddraw.beginPicture(0, 0, 1.02, 1.02)
 
       # create a tile with background color
-      stddraw.setPenColor(self.background_color)
-      stddraw.filledSquare(self.position.x, self.position.y, 0.51)
+      stddraw.setPenColor(background_color)
+      stddraw.filledSquare(0, 0, 0.51)
 
       # create a frame of tile boxes
-      stddraw.setPenColor(self.boundary_color)
+      stddraw.setPenColor(Tile.boundary_color)
       stddraw.setPenRadius(Tile.boundary_thickness)
-      stddraw.square(self.position.x, self.position.y, 0.51)
+      stddraw.square(0, 0, 0.51)
       stddraw.setPenRadius()
 
       # draw the number on the tile
-      stddraw.setPenColor(self.foreground_color)
+      stddraw.setPenColor(foreground_color)
       stddraw.setFontFamily(Tile.font_family)
       stddraw.setFontSize(Tile.font_size)
-      stddraw.text(self.position.x, self.position.y, str(self.number))
\ No newline at end of file
+      stddraw.text(0, 0, str(self.number))
+      return stddraw.endPicture()
\ No newline at end of file
@@ -0,0 +1,129 @@
+# the rules of the game applied to a batch of boards at once
+from game_engine import check_grids, merge_boards, delete_tiles
+from tetromino import Tetromino, orientations  # the shapes of the tetrominoes
+import numpy as np  # fundamental Python module for scientific computing
+
+# The (dx, dy) offsets of the tiles of each orientation of each type from the
+# bottom left cell of its tile matrix as an array of shape (7, 4, 4, 2), the
+# types are in the order of Tetromino.types
+type_offsets = np.array([[orientation.offsets for orientation
+                          in orientations[type]] for type in Tetromino.types])
+
+# Function that returns the heights of the columns of the given boards (the row
+# above the topmost tile of each column, or 0 when it is empty) as an array of
+# shape (B, grid_w)
+def column_heights(boards):
+   occupied = boards != 0
+   grid_h = boards.shape[1]
+   return np.where(occupied.any(axis=1),
+                   grid_h - occupied[:, ::-1].argmax(axis=1), 0)
+
+# Class used for playing B games at once for training bots, in the style of the
+# vectorized environments of reinforcement learning. The boards of the games
+# are stored as one array of shape (B, grid_h, grid_w) of the tile exponents
+# (as GameEngine.tile_matrix) and the rules of the game are applied to all the
+# boards at once, so the Python overhead of a step is paid once per batch.
+#
+# An action places the current tetromino of a game: action = turns * grid_w +
+# col rotates the tetromino clockwise turns times, moves it so that its
+# leftmost tile is in the column col (or as far right as it fits) and drops it
+# from above the board. The games that end are reset at the same step.
+#
+# An observation is a dictionary of arrays: the boards, the types (indexes in
+# Tetromino.types) and the tile exponents of the current tetrominoes and the
+# same for the next tetrominoes (see get_observation).
+class VectorEnv:
+   # Constructor that creates B games with the given grid size, the random
+   # values of the games are drawn from a generator with the given seed
+   def __init__(self, batch_size, grid_h=18, grid_w=12, seed=None):
+      self.batch_size = batch_size
+      self.grid_height, self.grid_width = grid_h, grid_w
+      # the number of the actions of each game
+      self.action_count = 4 * grid_w
+      self.rng = np.random.default_rng(seed)
+      self.reset()
+
+   # Method that starts new games on all the boards and returns the
+   # observation
+   def reset(self):
+      b = self.batch_size
+      self.boards = np.zeros((b, self.grid_height, self.grid_width),
+                             dtype=np.uint8)
+      self.scores = np.zeros(b, dtype=np.int64)
+      self.pieces = np.zeros(b, dtype=np.int64)
+      self.lines_cleared = np.zeros(b, dtype=np.int64)
+      self.merges = np.zeros(b, dtype=np.int64)
+      # the types (indexes in Tetromino.types) of the current and the next
+      # tetrominoes and the exponents of the numbers of their tiles
+      self.types, self.values = self.draw_pieces(b)
+      self.next_types, self.next_values = self.draw_pieces(b)
+      return self.get_observation()
+
+   # Method that returns the observation of the games: the boards as an array
+   # of shape (B, grid_h, grid_w), the types and the tile exponents (of shape
+   # (B, 4)) of the current and the next tetrominoes
+   def get_observation(self):
+      return {"boards": self.boards.copy(), "types": self.types.copy(),
+              "values": self.values.copy(),
+              "next_types": self.next_types.copy(),
+              "next_values": self.next_values.copy()}
+
+   # Method that returns the types and the tile exponents of n random
+   # tetrominoes
+   def draw_pieces(self, n):
+      types = self.rng.integers(0, len(Tetromino.types), n)
+      values = self.rng.integers(1, 3, (n, 4)).astype(np.uint8)
+      return types, values
+
+   # Method that returns the (x, y) positions of the tiles of the current
+   # tetrominoes placed with the given actions as two arrays of shape (B, 4)
+   def get_placements(self, actions):
+      turns = actions // self.grid_width % 4
+      cols = actions % self.grid_width
+      offsets = type_offsets[self.types, turns]
+      dx, dy = offsets[:, :, 0], offsets[:, :, 1]
+      # move the leftmost tile to the column of the action, but keep the
+      # tetromino inside the board
+      min_dx = dx.min(axis=1)
+      width = dx.max(axis=1) - min_dx + 1
+      left = np.minimum(cols, self.grid_width - width)
+      xs = (left - min_dx)[:, None] + dx
+      # the tetromino dropped from above the board lands on the highest of the
+      # columns below it
+      heights = column_heights(self.boards)
+      heights = np.take_along_axis(heights, xs, axis=1)
+      ys = (heights - dy).max(axis=1)[:, None] + dy
+      return xs, ys
+
+   # Method that places the current tetromino of each game with the given
+   # actions (an array of B action indexes), applies the rules of the game and
+   # returns the observation, the rewards (the score gained) and the done flags
+   # (the games that are over, they are reset) as arrays
+   def step(self, actions):
+      actions = np.asarray(actions)
+      xs, ys = self.get_placements(actions)
+      # lock the tiles of the tetrominoes, the game is over if any tile is
+      # above the topmost row of the board
+      inside = ys < self.grid_height
+      b = np.broadcast_to(np.arange(self.batch_size)[:, None], xs.shape)
+      self.boards[b[inside], ys[inside], xs[inside]] = self.values[inside]
+      dones = ~inside.all(axis=1)
+      # apply the rules of the game to all the boards
+      self.boards, cleared_gains, cleared = check_grids(self.boards)
+      self.boards, merge_gains, merges = merge_boards(self.boards)
+      self.boards, deleted_gains, _ = delete_tiles(self.boards)
+      rewards = cleared_gains + merge_gains + deleted_gains
+      self.scores += rewards
+      self.pieces += 1
+      self.lines_cleared += cleared
+      self.merges += merges
+      # the next tetrominoes become the current ones
+      self.types, self.values = self.next_types, self.next_values
+      self.next_types, self.next_values = self.draw_pieces(self.batch_size)
+      # start new games on the boards of the games that are over
+      if dones.any():
+         self.boards[dones] = 0
+         for counts in [self.scores, self.pieces, self.lines_cleared,
+                        self.merges]:
+            counts[dones] = 0
+      return self.get_observation(), rewards, dones